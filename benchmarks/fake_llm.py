@@ -0,0 +1,63 @@
+"""
+Fake LangChain chat model that stands in for Gemini with configurable latency.
+"""
+
+import json
+import time
+from typing import Any, Iterator, List, Optional
+from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from src.models import CATEGORIES
+
+CANNED_ANALYSIS = {
+    category: {
+        "score": "Good",
+        "issues": [f"Some {category.replace('_', ' ')} could be improved."],
+        "suggestions": [f"Review the {category.replace('_', ' ')} of each section."],
+    }
+    for category in CATEGORIES
+}
+
+class FakeChatModel(BaseChatModel):
+    """Answers analysis prompts with canned JSON and revision prompts with an echo of the input.
+
+    Latency is first_token_latency plus per_token_latency for every output token
+    (four characters per token), so long revisions cost more than short analyses.
+    """
+
+    first_token_latency: float = 0.5
+    per_token_latency: float = 0.002
+    chunk_tokens: int = 16
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat-model"
+
+    def _respond(self, messages: List[BaseMessage]) -> str:
+        """Pick the response for a prompt."""
+        prompt = "\n".join(str(message.content) for message in messages)
+        if "JSON" in prompt or "json" in prompt:
+            return json.dumps(CANNED_ANALYSIS)
+        # Revisions are roughly as long as the content they rewrite
+        return prompt[-min(len(prompt), 20000):]
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+        text = self._respond(messages)
+        time.sleep(self.first_token_latency + self.per_token_latency * len(text) / 4)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        text = self._respond(messages)
+        time.sleep(self.first_token_latency)
+        step = self.chunk_tokens * 4
+        for start in range(0, len(text), step):
+            piece = text[start:start + step]
+            time.sleep(self.per_token_latency * len(piece) / 4)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=piece))
+            if run_manager:
+                run_manager.on_llm_new_token(piece, chunk=chunk)
+            yield chunk
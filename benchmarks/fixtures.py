@@ -0,0 +1,91 @@
+"""
+Deterministic fixture documentation pages for the benchmark server.
+"""
+
+import random
+from typing import Callable, Dict, List
+
+WORDS = (
+    "configure install request response client server token cache index query parameter endpoint "
+    "returns the a an of to for with when each every value default option file path module function "
+    "call error timeout retry header body field schema version release upgrade deploy build test run "
+    "user project account key secret environment variable command line output input stream batch"
+).split()
+
+NAVIGATION = """
+<header><nav>
+  <a href="/">Home</a> <a href="/docs/">Docs</a> <a href="/api/">API</a> <a href="/blog/">Blog</a>
+</nav></header>
+"""
+
+FOOTER = """
+<footer>
+  <p>Copyright 2024 Example Corp. All rights reserved. Licensed under the Apache License, Version 2.0.</p>
+  <p>Found a problem with this page? Open an issue on GitHub or ask a question in the community forum.</p>
+</footer>
+"""
+
+def _sentence(rng: random.Random, min_words: int = 8, max_words: int = 24) -> str:
+    """Build one pseudo-random sentence."""
+    words = [rng.choice(WORDS) for _ in range(rng.randint(min_words, max_words))]
+    return " ".join(words).capitalize() + "."
+
+def _paragraph(rng: random.Random, sentences: int = 4) -> str:
+    """Build a paragraph of several sentences."""
+    return " ".join(_sentence(rng) for _ in range(sentences))
+
+def _sections(rng: random.Random, count: int, paragraphs: int = 3) -> List[str]:
+    """Build heading-delimited sections with prose, a list and a code sample."""
+    parts = []
+    for index in range(count):
+        parts.append(f"<h2>Section {index + 1}: {rng.choice(WORDS).title()} {rng.choice(WORDS)}</h2>")
+        parts += [f"<p>{_paragraph(rng)}</p>" for _ in range(paragraphs)]
+        parts.append("<ul>" + "".join(f"<li>{_sentence(rng, 4, 10)}</li>" for _ in range(3)) + "</ul>")
+        parts.append(f"<pre><code>client.{rng.choice(WORDS)}(timeout=30)\nprint(response.status)</code></pre>")
+    return parts
+
+def _page(title: str, body: List[str], chrome: bool = True) -> str:
+    """Wrap body elements in a documentation page layout."""
+    return (f"<!DOCTYPE html><html><head><title>{title}</title></head><body>"
+            f"{NAVIGATION if chrome else ''}<main><h1>{title}</h1>{''.join(body)}</main>"
+            f"{FOOTER if chrome else ''}</body></html>")
+
+def small_page() -> str:
+    """A short getting-started page (~3 KB)."""
+    return _page("Getting Started", _sections(random.Random(1), 3))
+
+def huge_page() -> str:
+    """A long reference page (~400 KB) that is analyzed in chunks."""
+    return _page("API Reference", _sections(random.Random(2), 250, paragraphs=4))
+
+def duplicate_heavy_page() -> str:
+    """A page where notes, warnings and examples are repeated many times."""
+    rng = random.Random(3)
+    note = f"<p>Note: {_paragraph(rng, 3)}</p>"
+    warning = f"<p>Warning: {_paragraph(rng, 2)}</p>"
+    body = []
+    for section in _sections(rng, 30):
+        body.append(section)
+        if section.startswith("<h2>"):
+            body += [note, warning]
+    return _page("Configuration Guide", body)
+
+def js_rendered_page() -> str:
+    """A single-page-app shell whose content only exists after JavaScript runs."""
+    content = "".join(_sections(random.Random(4), 10)).replace("\\", "\\\\").replace("`", "\\`")
+    return ("<!DOCTYPE html><html><head><title>Loading...</title></head><body>"
+            "<div id=\"root\"></div><script>"
+            "setTimeout(function () {"
+            f"document.getElementById('root').innerHTML = `<main><h1>Client Guide</h1>{content}</main>`;"
+            "}, 300);</script></body></html>")
+
+FIXTURES: Dict[str, Callable[[], str]] = {
+    "small": small_page,
+    "huge": huge_page,
+    "duplicate_heavy": duplicate_heavy_page,
+    "js_rendered": js_rendered_page,
+}
+
+def build_corpus() -> Dict[str, bytes]:
+    """Render every fixture once, keyed by its URL path."""
+    return {f"/docs/{name}.html": render().encode('utf-8') for name, render in FIXTURES.items()}
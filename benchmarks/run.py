@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark runner: fixture pages from a local server, a fake LLM, and baseline diffs.
+
+Usage:
+    python -m benchmarks.run --iterations 5 --save-baseline
+    python -m benchmarks.run --compare
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Any, Callable, Dict, List
+import numpy as np
+from benchmarks.fake_llm import FakeChatModel
+from benchmarks.fixtures import FIXTURES, build_corpus
+from benchmarks.server import FixtureServer
+from src.analyzer import DocumentationAnalyzer
+from src.cache import LLMCache, ScrapeCache, SectionStore
+from src.telemetry import Tracer
+
+SCENARIOS = ["scrape_page", "analyze_content", "revise_content", "analyze_documentation"]
+BASELINE_DIR = os.path.join(os.path.dirname(__file__), 'baselines')
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of the whole process so far, in megabytes; not attributable to one case."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+class Bench:
+    """Builds cold analyzers backed by the fake model and throwaway caches."""
+
+    def __init__(self, llm: FakeChatModel, workdir: str):
+        self.llm = llm
+        self.workdir = workdir
+        self._caches = []
+
+    def analyzer(self) -> DocumentationAnalyzer:
+        """Return an analyzer with empty caches so every iteration does the full work."""
+        path = os.path.join(self.workdir, f"run-{len(self._caches)}")
+        caches = (ScrapeCache(os.path.join(path, 'scrape.db')), LLMCache(os.path.join(path, 'llm.db')),
+                  SectionStore(os.path.join(path, 'sections.db')))
+        self._caches.append(caches)
+        return DocumentationAnalyzer("benchmark", llm=self.llm, scrape_cache=caches[0], llm_cache=caches[1],
+                                     section_store=caches[2], tracer=Tracer())
+
+    def close(self):
+        """Close every cache opened for the run."""
+        for caches in self._caches:
+            for cache in caches:
+                cache.close()
+
+def peak_allocated_mb(prepare: Callable[[], Callable[[], Any]]) -> float:
+    """Peak memory allocated by one extra run of a case, in megabytes.
+
+    Traced separately from the timed runs (tracemalloc slows allocation down) and reset
+    per case, so earlier cases do not inflate the figure the way the process RSS peak does.
+    """
+    run = prepare()
+    tracemalloc.start()
+    try:
+        run()
+        return tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+    finally:
+        tracemalloc.stop()
+
+def measure(prepare: Callable[[], Callable[[], Any]], iterations: int) -> Dict[str, Any]:
+    """Time iterations of a callable, then trace one more run's memory; prepare() runs untimed."""
+    latencies: List[float] = []
+    for _ in range(iterations):
+        run = prepare()
+        started = time.perf_counter()
+        run()
+        latencies.append(time.perf_counter() - started)
+    peak_mb = peak_allocated_mb(prepare)
+
+    samples = np.array(latencies)
+    return {
+        "iterations": iterations,
+        "mean_seconds": round(float(samples.mean()), 4),
+        "p50_seconds": round(float(np.percentile(samples, 50)), 4),
+        "p90_seconds": round(float(np.percentile(samples, 90)), 4),
+        "p99_seconds": round(float(np.percentile(samples, 99)), 4),
+        "max_seconds": round(float(samples.max()), 4),
+        "throughput_per_minute": round(iterations / samples.sum() * 60, 2) if samples.sum() else 0.0,
+        "peak_alloc_mb": round(peak_mb, 1),
+    }
+
+def run_benchmarks(fixtures: List[str], scenarios: List[str], iterations: int, llm: FakeChatModel) -> Dict[str, Any]:
+    """Run every scenario against every fixture and collect the measurements."""
+    results: Dict[str, Any] = {}
+    with FixtureServer(build_corpus()) as server, tempfile.TemporaryDirectory() as workdir:
+        bench = Bench(llm, workdir)
+        for fixture in fixtures:
+            url = f"{server.base_url}/docs/{fixture}.html"
+            try:
+                content = bench.analyzer().scrape_page(url)
+            except Exception as e:
+                print(f"Skipping fixture {fixture}: {e}")
+                for scenario in scenarios:
+                    results[f"{scenario}/{fixture}"] = {"error": str(e)}
+                continue
+            analysis = bench.analyzer().analyze_content(content, url)
+
+            cases: Dict[str, Callable[[], Callable[[], Any]]] = {
+                "scrape_page": lambda: (lambda a=bench.analyzer(): a.scrape_page(url)),
+                "analyze_content": lambda: (lambda a=bench.analyzer(): a.analyze_content(content, url)),
+                "revise_content": lambda: (lambda a=bench.analyzer(): a.revise_content(content, analysis)),
+                "analyze_documentation": lambda: (lambda a=bench.analyzer(): a.analyze_documentation(url)),
+            }
+            for scenario in scenarios:
+                name = f"{scenario}/{fixture}"
+                print(f"Running {name} ({iterations} iterations)...")
+                try:
+                    results[name] = measure(cases[scenario], iterations)
+                except Exception as e:
+                    print(f"{name} failed: {e}")
+                    results[name] = {"error": str(e)}
+        bench.close()
+    return results
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> bool:
+    """Print per-case changes against a baseline; return True when a case regressed beyond threshold."""
+    regressed = False
+    print(f"\n{'case':<40}{'p50 base':>10}{'p50 now':>10}{'change':>9}{'mem now':>9}{'change':>9}")
+    for name, now in current["results"].items():
+        before = baseline["results"].get(name)
+        # Baselines saved before per-case memory tracing have no peak_alloc_mb
+        if not before or "error" in before or "error" in now or "peak_alloc_mb" not in before:
+            print(f"{name:<40}{'(no comparable baseline)':>38}")
+            continue
+        latency_change = (now["p50_seconds"] - before["p50_seconds"]) / before["p50_seconds"] if before["p50_seconds"] else 0.0
+        memory_change = (now["peak_alloc_mb"] - before["peak_alloc_mb"]) / before["peak_alloc_mb"] \
+            if before["peak_alloc_mb"] else 0.0
+        flag = ""
+        if latency_change > threshold or memory_change > threshold:
+            regressed = True
+            flag = "  REGRESSION"
+        print(f"{name:<40}{before['p50_seconds']:>10.3f}{now['p50_seconds']:>10.3f}{latency_change:>+9.1%}"
+              f"{now['peak_alloc_mb']:>9.1f}{memory_change:>+9.1%}{flag}")
+    return regressed
+
+def baseline_path(name: str) -> str:
+    """Location of a named baseline file."""
+    return os.path.join(BASELINE_DIR, f"{name}.json")
+
+def parse_args(argv=None) -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Benchmark DocuMetrics offline against fixture pages and a fake LLM.")
+    parser.add_argument("--fixtures", default=",".join(FIXTURES), help=f"Comma-separated fixtures (default: all of {', '.join(FIXTURES)})")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help=f"Comma-separated scenarios (default: all of {', '.join(SCENARIOS)})")
+    parser.add_argument("--iterations", type=int, default=3, help="Timed runs per case (default: 3)")
+    parser.add_argument("--latency", type=float, default=0.3, help="Fake LLM time to first token in seconds (default: 0.3)")
+    parser.add_argument("--per-token-latency", type=float, default=0.0005,
+                        help="Fake LLM seconds per output token (default: 0.0005)")
+    parser.add_argument("--output", help="Also write the results to this JSON file")
+    parser.add_argument("--save-baseline", nargs="?", const="default", metavar="NAME",
+                        help="Save the results as benchmarks/baselines/NAME.json")
+    parser.add_argument("--compare", nargs="?", const="default", metavar="NAME",
+                        help="Diff the results against a saved baseline; exits 1 on regression")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="Relative p50 latency or peak memory increase counted as a regression (default: 0.10)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    """Run the benchmarks, then save and/or compare baselines."""
+    args = parse_args(argv)
+    fixtures = [name for name in args.fixtures.split(",") if name]
+    scenarios = [name for name in args.scenarios.split(",") if name]
+    unknown = [name for name in fixtures if name not in FIXTURES] + [name for name in scenarios if name not in SCENARIOS]
+    if unknown:
+        print(f"Unknown fixtures or scenarios: {', '.join(unknown)}")
+        sys.exit(2)
+
+    llm = FakeChatModel(first_token_latency=args.latency, per_token_latency=args.per_token_latency)
+    report = {
+        "meta": {
+            "created_at": datetime.now().isoformat(timespec='seconds'),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "iterations": args.iterations,
+            "latency": args.latency,
+            "per_token_latency": args.per_token_latency,
+        },
+        "results": run_benchmarks(fixtures, scenarios, args.iterations, llm),
+    }
+    report["meta"]["process_peak_rss_mb"] = round(peak_rss_mb(), 1)
+
+    print(f"\n{'case':<40}{'p50 s':>9}{'p90 s':>9}{'p99 s':>9}{'per min':>10}{'mem MB':>9}")
+    for name, result in report["results"].items():
+        if "error" in result:
+            print(f"{name:<40}  error: {result['error'][:60]}")
+            continue
+        print(f"{name:<40}{result['p50_seconds']:>9.3f}{result['p90_seconds']:>9.3f}{result['p99_seconds']:>9.3f}"
+              f"{result['throughput_per_minute']:>10.1f}{result['peak_alloc_mb']:>9.1f}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    if args.save_baseline:
+        os.makedirs(BASELINE_DIR, exist_ok=True)
+        with open(baseline_path(args.save_baseline), 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nBaseline saved to {baseline_path(args.save_baseline)}")
+    if args.compare:
+        path = baseline_path(args.compare)
+        if not os.path.exists(path):
+            print(f"\nNo baseline at {path}; run with --save-baseline first.")
+            sys.exit(2)
+        with open(path, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        if compare(report, baseline, args.threshold):
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Local HTTP server that serves the fixture corpus from memory.
+"""
+
+import threading
+from functools import partial
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    """Serves pre-rendered fixture pages; anything else is a 404."""
+
+    def __init__(self, corpus: Dict[str, bytes], *args, **kwargs):
+        self.corpus = corpus
+        super().__init__(*args, **kwargs)
+
+    def do_GET(self):
+        """Return the requested fixture page."""
+        body = self.corpus.get(self.path.split('?')[0])
+        if body is None:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        """Keep benchmark output free of access logs."""
+
+class FixtureServer:
+    """Runs the fixture server on a background thread."""
+
+    def __init__(self, corpus: Dict[str, bytes], host: str = "127.0.0.1", port: int = 0):
+        """Bind to host:port; port 0 picks a free port."""
+        self.httpd = ThreadingHTTPServer((host, port), partial(FixtureHandler, corpus))
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        """Root URL of the running server."""
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self) -> "FixtureServer":
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.httpd.shutdown()
+        self.httpd.server_close()
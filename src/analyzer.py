@@ -5,26 +5,81 @@ Main analyzer class implementation.
 
 import os
 import time
+import urllib.error
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import replace
 from datetime import datetime
-from typing import Dict, List, Any, Optional
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from langchain_google_genai import ChatGoogleGenerativeAI
+from typing import Callable, Dict, Iterator, List, Any, Optional, Tuple
+from langchain_core.exceptions import OutputParserException
+from langchain_core.language_models import BaseChatModel
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import JsonOutputParser, StrOutputParser
-from src.models import DocumentationAnalysis
-from src.utils import load_prompt_template
+from src.browser import BrowserPool, get_browser_pool
+from src.budget import CHARS_PER_TOKEN, TokenBudget, UsageReport, compact_content, estimate_tokens, trim_feedback
+from src.cache import LLMCache, ScrapeCache, SectionStore, normalize_url
+from src.dedup import BoilerplateFilter, Deduplicator
+from src.llm_client import GeminiChatModel, LLMClient, get_llm_client
+from src.metrics import MetricThresholds, compute_metrics, local_analysis, passes_thresholds
+from src.models import CATEGORIES, CATEGORY_MODELS, DocumentationAnalysis, analysis_model, overall_score
+from src.partial_json import CategoryStreamParser, repair_json, valid_categories
+from src.sections import (
+    Section, has_feedback, merge_analyses, pack_chunks, route_feedback, section_fingerprint, section_units,
+    split_sections,
+)
+from src.scraper import (
+    MISSING_PAGE_STATUS_CODES, ScrapeResult, extract_from_driver, extract_from_html, extract_links_from_driver,
+    extract_links_from_html, fetch_html, fetch_if_modified, has_real_content, wait_for_content,
+)
+from src.telemetry import Tracer, get_tracer
+from src.utils import load_prompt_template, prompt_fingerprint
 
 class DocumentationAnalyzer:
     """Main class for analyzing documentation using LangChain."""
     
-    def __init__(self, api_key: str):
-        """Initialize the analyzer with LangChain components."""
-        self.llm = ChatGoogleGenerativeAI(
-            model="gemini-2.0-flash",
+    def __init__(self, api_key: str, browser_pool: Optional[BrowserPool] = None,
+                 scrape_cache: Optional[ScrapeCache] = None, llm_cache: Optional[LLMCache] = None,
+                 section_store: Optional[SectionStore] = None, page_load_timeout: float = 15.0,
+                 analysis_mode: str = "auto", chunk_size: Optional[int] = None, max_concurrency: int = 4,
+                 min_section_chars: int = 400, fast_mode: bool = False,
+                 metric_thresholds: Optional[MetricThresholds] = None, dedup_enabled: bool = True,
+                 token_budget: Optional[TokenBudget] = None, tracer: Optional[Tracer] = None,
+                 llm: Optional[BaseChatModel] = None, category_models: Optional[Dict[str, str]] = None,
+                 revision_mode: str = "auto", llm_client: Optional[LLMClient] = None):
+        """Initialize the analyzer with LangChain components.
+
+        chunk_size (in characters) defaults to three quarters of the token budget, so only
+        pages too long for one prompt are chunked or revised section by section.
+        llm replaces the Gemini chat model; category_models maps categories to the Gemini
+        model used for them in parallel mode (default: the main model). LLM requests are
+        paced, retried and coalesced by llm_client (default: the process-wide client).
+        """
+        self.browser_pool = browser_pool or get_browser_pool()
+        self.scrape_cache = scrape_cache or ScrapeCache()
+        self.llm_cache = llm_cache or LLMCache()
+        self.section_store = section_store or SectionStore()
+        self.page_load_timeout = page_load_timeout
+        self.analysis_mode = analysis_mode
+        self.revision_mode = revision_mode
+        self.max_concurrency = max_concurrency
+        self.min_section_chars = min_section_chars
+        self.fast_mode = fast_mode
+        self.metric_thresholds = metric_thresholds or MetricThresholds()
+        self.dedup_enabled = dedup_enabled
+        self.deduplicator = Deduplicator()
+        self.dedup_stats = Counter()
+        self.token_budget = token_budget or TokenBudget()
+        # The rest of the budget is left for the prompt template and format instructions
+        self.chunk_size = chunk_size or self.token_budget.max_input_tokens * CHARS_PER_TOKEN * 3 // 4
+        self.usage = UsageReport()
+        self.last_section_stats: Dict[str, int] = {}
+        self.fetch_stats = Counter()
+        self.tracer = tracer or get_tracer()
+        self.llm_client = llm_client or get_llm_client()
+
+        self.model_name = "gemini-2.0-flash" if llm is None else llm._llm_type
+        self.llm = llm or GeminiChatModel(
+            model=self.model_name,
             google_api_key=api_key,
         )
         
@@ -35,152 +90,689 @@ class DocumentationAnalyzer:
         # Load prompt templates
         self.analysis_prompt = ChatPromptTemplate.from_messages(load_prompt_template("analysis"))
         self.revision_prompt = ChatPromptTemplate.from_messages(load_prompt_template("revision"))
+        self.section_revision_prompt = ChatPromptTemplate.from_messages(load_prompt_template("section_revision"))
+        self.category_prompts = {
+            category: ChatPromptTemplate.from_messages(load_prompt_template(category)) for category in CATEGORIES
+        }
+        self.prompts = {
+            "analysis": self.analysis_prompt,
+            "revision": self.revision_prompt,
+            "section_revision": self.section_revision_prompt,
+            **self.category_prompts,
+        }
+
+        # Cached responses from edited prompt files are dropped up front
+        self.prompt_hashes = {name: prompt_fingerprint(name) for name in self.prompts}
+        for name, prompt_hash in self.prompt_hashes.items():
+            self.llm_cache.invalidate_prompt(name, prompt_hash)
         
-        # Create chains
-        self.analysis_chain = self.analysis_prompt | self.llm | self.json_parser
+        # Create chains; analysis JSON is parsed incrementally as it streams (see _stream_analysis)
+        self.analysis_chain = self.analysis_prompt | self.llm | self.str_parser
         self.revision_chain = self.revision_prompt | self.llm | self.str_parser
+        self.section_revision_chain = self.section_revision_prompt | self.llm | self.str_parser
+
+        # Per-category chains for parallel mode, each with its own prompt, schema and (optionally) model
+        self.category_model_names = {
+            category: (category_models or {}).get(category, self.model_name) for category in CATEGORIES
+        }
+        llms = {self.model_name: self.llm}
+        for model_name in set(self.category_model_names.values()) - set(llms):
+            llms[model_name] = GeminiChatModel(model=model_name, google_api_key=api_key)
+        self.category_chains = {
+            category: self.category_prompts[category] | llms[self.category_model_names[category]]
+            | JsonOutputParser(pydantic_object=CATEGORY_MODELS[category])
+            for category in CATEGORIES
+        }
+
+    def get_page(self, url: str, refresh: bool = False) -> ScrapeResult:
+        """Return page content through the scrape cache, revalidating stale entries."""
+        with self.tracer.span("page.get"):
+            cached = None if refresh else self.scrape_cache.get(url)
+            prefetched = None
+            if cached is not None:
+                if self.scrape_cache.is_fresh(cached):
+                    self.fetch_stats["cache"] += 1
+                    self.tracer.incr("scrape_cache.hits")
+                    print(f"Content served from scrape cache: {url}")
+                    return cached
+                with self.tracer.span("page.revalidate"):
+                    try:
+                        prefetched = fetch_if_modified(url, cached.etag, cached.last_modified)
+                        not_modified = prefetched is None
+                    except Exception:
+                        prefetched, not_modified = None, False
+                if not_modified:
+                    self.scrape_cache.touch(url)
+                    self.fetch_stats["revalidated"] += 1
+                    self.tracer.incr("scrape_cache.revalidated")
+                    print(f"Cached content revalidated (304 Not Modified): {url}")
+                    return cached
+
+            self.tracer.incr("scrape_cache.misses")
+            result = self.fetch_page(url, prefetched)
+            self.scrape_cache.put(result)
+            return result
 
     def scrape_page(self, url: str) -> str:
         """Scrape content from a documentation page."""
-        options = Options()
-        options.add_argument('--headless')
-        options.add_argument('--disable-gpu')
-        options.add_argument('--window-size=1920,1080')
-        options.add_argument('--no-sandbox')
-        options.add_argument('--disable-dev-shm-usage')
-        options.add_argument('--disable-blink-features=AutomationControlled')
-        options.add_experimental_option("excludeSwitches", ["enable-automation"])
-        options.add_experimental_option('useAutomationExtension', False)
-        options.add_argument('--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
-        
-        driver = webdriver.Chrome(options=options)
-        
+        return self.fetch_page(url).content
+
+    def fetch_page(self, url: str,
+                   prefetched: Optional[Tuple[str, Dict[str, Optional[str]]]] = None) -> ScrapeResult:
+        """Fetch a page, trying a plain HTTP fetch before falling back to Chrome.
+
+        prefetched is HTML and validators already downloaded, such as by a revalidation
+        request that returned a changed page; it is used instead of fetching again.
+        """
+        print(f"Scraping content from: {url}")
+        result = self._fetch_static(url, prefetched)
+        if result is None:
+            self.tracer.incr("fetch.browser_fallbacks")
+            result = self._fetch_with_browser(url)
+
+        self.fetch_stats[result.tier] += 1
+        print(f"Content served by {result.tier} tier ({len(result.content)} chars)")
+        return result
+
+    def _fetch_static(self, url: str,
+                      prefetched: Optional[Tuple[str, Dict[str, Optional[str]]]] = None) -> Optional[ScrapeResult]:
+        """Fetch server-rendered pages without a browser; None when the page needs JS.
+
+        Missing pages (400, 404, 410) are raised as they are, since rendering them in Chrome
+        would not change them; other errors and non-HTML responses fall back to the browser.
+        """
         try:
-            print(f"Scraping content from: {url}")
-            driver.get(url)
-            driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
-            time.sleep(15)
-            
-            content_parts = []
-            main_selectors = [
-                "main", ".main-content", "#main-content", 
-                ".article-content", ".content", ".post-content",
-                ".entry-content", "[role='main']"
-            ]
-            
-            # Try multiple content extraction strategies
-            for selector in main_selectors:
-                try:
-                    main_element = driver.find_element(By.CSS_SELECTOR, selector)
-                    if main_element and main_element.text.strip():
-                        elements = main_element.find_elements(By.CSS_SELECTOR, "h1, h2, h3, h4, h5, h6, p, ul, ol, li, pre, code, div")
-                        for element in elements:
-                            text = element.text.strip()
-                            if text and len(text) > 10:
-                                tag = element.tag_name.lower()
-                                if tag.startswith('h') and len(tag) == 2:
-                                    content_parts.append(f"\n{'#' * int(tag[1])} {text}\n")
-                                else:
-                                    content_parts.append(text)
-                        break
-                except Exception:
-                    continue
-            
-            if not content_parts:
-                content_text = driver.execute_script("""
-                    var scripts = document.querySelectorAll('script, style, nav, footer, header, .nav, .footer, .header');
-                    scripts.forEach(function(el) { el.remove(); });
-                    var mainContent = document.querySelector('main, .main-content, #main-content, .article-content, .content') || document.body;
-                    return mainContent.innerText || mainContent.textContent || '';
-                """)
-                if content_text:
-                    content_parts = [content_text.strip()]
-            
-            if content_parts:
-                content = "\n\n".join(content_parts)
-                lines = [line.strip() for line in content.split('\n') if line.strip() and len(line.strip()) > 3]
-                return "\n".join(lines)
-            
-            raise Exception("No substantial content found")
-            
+            with self.tracer.span("page.load.http"):
+                html, validators = prefetched or fetch_html(url)
+            with self.tracer.span("extract.html"):
+                content = extract_from_html(html)
+        except urllib.error.HTTPError as e:
+            if e.code in MISSING_PAGE_STATUS_CODES:
+                self.tracer.incr("fetch.client_errors")
+                raise Exception(f"HTTP {e.code} {e.reason} for {url}") from e
+            print(f"Static fetch failed, falling back to browser: {e}")
+            return None
         except Exception as e:
-            print(f"Error scraping page: {e}")
+            print(f"Static fetch failed, falling back to browser: {e}")
+            return None
+        if not has_real_content(content):
+            return None
+        return ScrapeResult(url=url, content=content, tier="http",
+                            links=extract_links_from_html(html, url), **validators)
+
+    def _fetch_with_browser(self, url: str) -> ScrapeResult:
+        """Render the page in a pooled Chrome session and extract its content."""
+        with self.browser_pool.lease() as driver:
+            try:
+                with self.tracer.span("page.load.browser"):
+                    driver.get(url)
+                    driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+                    wait_for_content(driver, timeout=self.page_load_timeout)
+
+                with self.tracer.span("extract.browser"):
+                    content = extract_from_driver(driver)
+                    links = extract_links_from_driver(driver) if content else []
+                if content:
+                    return ScrapeResult(url=url, content=content, tier="browser", links=links)
+
+                raise Exception("No substantial content found")
+
+            except Exception as e:
+                print(f"Error scraping page: {e}")
+                raise
+
+    def prepare_content(self, content: str, url: str,
+                        boilerplate_filter: Optional[BoilerplateFilter] = None) -> str:
+        """Strip duplicate (and, in batch mode, site-wide boilerplate) blocks before prompting."""
+        if not self.dedup_enabled:
+            return content
+
+        with self.tracer.span("dedup"):
+            content, report = self.deduplicator.deduplicate(content)
+            if boilerplate_filter is not None:
+                content, boilerplate_report = boilerplate_filter.filter(content, normalize_url(url))
+                report.boilerplate = boilerplate_report.boilerplate
+                report.bytes_saved += boilerplate_report.bytes_saved
+
+        self.dedup_stats["blocks_removed"] += report.removed
+        self.dedup_stats["bytes_saved"] += report.bytes_saved
+        self.dedup_stats["tokens_saved"] += report.tokens_saved
+        if report.removed:
+            print(f"Removed {report.exact_duplicates} exact, {report.near_duplicates} near-duplicate and "
+                  f"{report.boilerplate} boilerplate blocks ({report.bytes_saved} bytes, ~{report.tokens_saved} tokens)")
+        return content
+
+    def _prompt_text(self, prompt_name: str, inputs: Dict[str, Any]) -> str:
+        """Render a prompt to the text that is actually sent to the model."""
+        return "\n".join(str(message.content) for message in self.prompts[prompt_name].format_messages(**inputs))
+
+    def _apply_budget(self, prompt_name: str, inputs: Dict[str, Any], budget_field: Optional[str]) -> bool:
+        """Compact inputs[budget_field] in place so the whole prompt fits the token budget."""
+        if budget_field is None:
+            return False
+        overhead = estimate_tokens(self._prompt_text(prompt_name, {**inputs, budget_field: ""}))
+        available = max(self.token_budget.max_input_tokens - overhead, 0)
+        inputs[budget_field], report = compact_content(inputs[budget_field], available,
+                                                       self.token_budget.min_block_words)
+        if report.tokens_after < report.tokens_before:
+            print(f"Compacted {prompt_name} input from ~{report.tokens_before} to ~{report.tokens_after} tokens"
+                  f"{' (truncated)' if report.truncated else ''}")
+            return True
+        return False
+
+    def _run_chain(self, chain, inputs: Dict[str, Any], key: str, prompt_tokens: int) -> Tuple[Any, bool]:
+        """Run a prompt | llm | parser chain one step at a time so each stage is timed separately.
+
+        Only the model call goes through the LLM client, so output that fails to parse is
+        never retried. Returns (parsed output, shared) as LLMClient.call does.
+        """
+        prompt, llm, parser = chain.steps
+        with self.tracer.span("prompt.build"):
+            prompt_value = prompt.invoke(inputs)
+        message, shared = self.llm_client.call(key, prompt_tokens, lambda: self._call_llm(llm, prompt_value),
+                                               self.tracer)
+        with self.tracer.span("llm.parse"):
+            return parser.invoke(message), shared
+
+    def _call_llm(self, llm: BaseChatModel, prompt_value) -> Any:
+        """Send one prompt to the model, timing the call and counting errors."""
+        try:
+            with self.tracer.span("llm.call"):
+                return llm.invoke(prompt_value)
+        except Exception:
+            self.tracer.incr("llm.errors")
             raise
-        finally:
-            driver.quit()
 
-    def analyze_content(self, content: str, url: str) -> Dict[str, Any]:
-        """Analyze content using LangChain."""
+    def _stream_steps(self, chain, inputs: Dict[str, Any]) -> Iterator[str]:
+        """Stream a prompt | llm | parser chain, timing the prompt build, first token and whole stream."""
+        prompt, llm, parser = chain.steps
+        with self.tracer.span("prompt.build"):
+            prompt_value = prompt.invoke(inputs)
+        started = time.perf_counter()
+        first = True
         try:
+            for chunk in (llm | parser).stream(prompt_value):
+                if first:
+                    self.tracer.observe("llm.first_token", time.perf_counter() - started)
+                    first = False
+                yield chunk
+        except Exception:
+            self.tracer.incr("llm.errors")
+            self.tracer.observe("llm.stream", time.perf_counter() - started, failed=True)
+            raise
+        self.tracer.observe("llm.stream", time.perf_counter() - started)
+
+    def _invoke_chain(self, prompt_name: str, chain, inputs: Dict[str, Any],
+                      budget_field: Optional[str] = None, model_name: Optional[str] = None) -> Any:
+        """Invoke a chain within the token budget, serving repeated requests from the LLM cache."""
+        compacted = self._apply_budget(prompt_name, inputs, budget_field)
+        prompt_hash = self.prompt_hashes[prompt_name]
+        key = self.llm_cache.make_key(model_name or self.model_name, prompt_hash, inputs)
+        cached = self.llm_cache.get(key)
+        if cached is not None:
+            print(f"Using cached {prompt_name} response")
+            self.tracer.incr("llm_cache.hits")
+            self.usage.record(prompt_name, self._prompt_text(prompt_name, inputs), cached, 0.0, cached=True)
+            return cached
+
+        self.tracer.incr("llm_cache.misses")
+        prompt_text = self._prompt_text(prompt_name, inputs)
+        started = time.monotonic()
+        result, shared = self._run_chain(chain, inputs, key, estimate_tokens(prompt_text))
+        result = result.dict() if hasattr(result, 'dict') else result
+        if shared:
+            print(f"Joined an identical in-flight {prompt_name} request")
+            self.usage.record(prompt_name, prompt_text, result, 0.0, cached=True)
+            return result
+        self.usage.record(prompt_name, prompt_text, result, time.monotonic() - started, compacted=compacted)
+        self.llm_cache.put(key, prompt_name, prompt_hash, result)
+        return result
+
+    def _stream_chain(self, prompt_name: str, chain, inputs: Dict[str, Any],
+                      budget_field: Optional[str] = None) -> Iterator[str]:
+        """Stream a text chain's output, caching the full text once the stream completes."""
+        compacted = self._apply_budget(prompt_name, inputs, budget_field)
+        prompt_hash = self.prompt_hashes[prompt_name]
+        key = self.llm_cache.make_key(self.model_name, prompt_hash, inputs)
+        cached = self.llm_cache.get(key)
+        if cached is not None:
+            print(f"Using cached {prompt_name} response")
+            self.tracer.incr("llm_cache.hits")
+            self.usage.record(prompt_name, self._prompt_text(prompt_name, inputs), cached, 0.0, cached=True)
+            yield cached
+            return
+
+        self.tracer.incr("llm_cache.misses")
+        prompt_text = self._prompt_text(prompt_name, inputs)
+        started = time.monotonic()
+        stream, shared = self.llm_client.stream(key, estimate_tokens(prompt_text),
+                                                lambda: self._stream_steps(chain, inputs), self.tracer)
+        chunks = []
+        for chunk in stream:
+            chunks.append(chunk)
+            yield chunk
+        text = "".join(chunks)
+        if shared:
+            self.usage.record(prompt_name, prompt_text, text, 0.0, cached=True)
+            return
+        self.usage.record(prompt_name, prompt_text, text, time.monotonic() - started, compacted=compacted)
+        self.llm_cache.put(key, prompt_name, prompt_hash, text)
+
+    def analyze_content(self, content: str, url: str, mode: Optional[str] = None,
+                        fast_mode: Optional[bool] = None,
+                        on_category: Optional[Callable[[str, Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        """Analyze content using LangChain.
+
+        Modes: "single" sends the whole page in one prompt, "parallel" sends one prompt per
+        category concurrently, "chunked" maps heading-aligned chunks concurrently,
+        "incremental" only re-analyzes sections that changed since the last run, and
+        "auto" (the default) chunks pages longer than chunk_size. Local
+        metrics are attached under "metrics"; in fast mode pages that meet the metric
+        thresholds skip the LLM entirely. mode and fast_mode override the analyzer's
+        defaults for this call only. on_category(category, data) is called for each
+        category as soon as it is available, which in single mode is while the model is
+        still generating the rest.
+        """
+        emitted = set()
+
+        def emit(category: str, data: Dict[str, Any]):
+            emitted.add(category)
+            if on_category is not None:
+                on_category(category, data)
+
+        with self.tracer.span("metrics"):
+            metrics = compute_metrics(content)
+        fast_mode = self.fast_mode if fast_mode is None else fast_mode
+        if fast_mode and passes_thresholds(metrics, self.metric_thresholds):
+            print("Page meets local metric thresholds; skipping LLM analysis (fast mode)")
+            self.tracer.incr("analysis.fast_mode_skips")
+            analysis = local_analysis(metrics)
+        else:
+            with self.tracer.span("analysis"):
+                analysis = self._analyze_with_llm(content, url, mode or self.analysis_mode, emit)
+        for category in CATEGORIES:
+            if category in analysis and category not in emitted:
+                emit(category, analysis[category])
+        analysis["metrics"] = metrics
+        return analysis
+
+    def _analyze_with_llm(self, content: str, url: str, mode: str,
+                          on_category: Optional[Callable[[str, Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        """Run the LLM analysis in the requested mode, falling back to a placeholder on failure."""
+        if mode == "auto":
+            mode = "chunked" if len(content) > self.chunk_size else "single"
+        try:
+            if mode == "chunked":
+                return self._analyze_chunked(content, url)
+            if mode == "incremental":
+                return self._analyze_incremental(content, url)
+            if mode == "parallel":
+                return self._analyze_parallel(content, url, on_category)
             print("Analyzing content with LangChain + Gemini...")
-            format_instructions = self.json_parser.get_format_instructions()
-            result = self.analysis_chain.invoke({
-                "content": content,
-                "url": url,
-                "format_instructions": format_instructions
-            })
-            return result.dict() if hasattr(result, 'dict') else result
+            return self._analyze_single(content, url, on_category)
         except Exception as e:
             print(f"Error during analysis: {e}")
-            return {cat: {
-                "score": "Fair",
-                "issues": ["Analysis failed"],
-                "suggestions": ["Please try again"]
-            } for cat in ["readability", "structure", "completeness", "style_guidelines"]}
-
-    def revise_content(self, original_content: str, analysis: Dict[str, Any]) -> str:
-        """Revise content based on analysis."""
+            self.tracer.incr("analysis.fallbacks")
+            return self._fallback_analysis()
+
+    def _analyze_single(self, content: str, url: str,
+                        on_category: Optional[Callable[[str, Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        """Analyze content in a single streamed prompt, re-requesting only categories that did not parse."""
+        inputs = {
+            "content": content,
+            "url": url,
+            "format_instructions": self.json_parser.get_format_instructions()
+        }
+        analysis = self._stream_analysis(inputs, CATEGORIES, on_category)
+
+        missing = [category for category in CATEGORIES if category not in analysis]
+        if missing:
+            print(f"Re-requesting {len(missing)} incomplete categories: {', '.join(missing)}")
+            self.tracer.incr("analysis.rerequested_categories", len(missing))
+            parser = JsonOutputParser(pydantic_object=analysis_model(missing))
+            # inputs["content"] was already compacted to the budget by the first request
+            analysis.update(self._stream_analysis(
+                {**inputs, "format_instructions": parser.get_format_instructions()}, missing, on_category
+            ))
+
+        missing = [category for category in CATEGORIES if category not in analysis]
+        if len(missing) == len(CATEGORIES):
+            raise Exception("No category could be parsed from the model output")
+        for category in missing:
+            self.tracer.incr("analysis.category_fallbacks")
+            analysis[category] = self._fallback_analysis()[category]
+        if missing:
+            analysis["failed_categories"] = missing
+        return analysis
+
+    def _stream_analysis(self, inputs: Dict[str, Any], categories: List[str],
+                         on_category: Optional[Callable[[str, Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        """Stream one analysis request, reporting categories as they complete and salvaging malformed output.
+
+        Returns the categories that could be parsed; only complete responses are cached.
+        """
+        def emit(found):
+            for category, data in found:
+                if on_category is not None:
+                    on_category(category, data)
+
+        compacted = self._apply_budget("analysis", inputs, "content")
+        prompt_hash = self.prompt_hashes["analysis"]
+        key = self.llm_cache.make_key(self.model_name, prompt_hash, inputs)
+        cached = self.llm_cache.get(key)
+        if cached is not None:
+            print("Using cached analysis response")
+            self.tracer.incr("llm_cache.hits")
+            self.usage.record("analysis", self._prompt_text("analysis", inputs), cached, 0.0, cached=True)
+            found = valid_categories(cached, categories)
+            emit(found.items())
+            return found
+
+        self.tracer.incr("llm_cache.misses")
+        prompt_text = self._prompt_text("analysis", inputs)
+        parser = CategoryStreamParser(categories)
+        started = time.monotonic()
+        stream, shared = self.llm_client.stream(key, estimate_tokens(prompt_text),
+                                                lambda: self._stream_steps(self.analysis_chain, inputs), self.tracer)
+        try:
+            for chunk in stream:
+                emit(parser.feed(chunk))
+        except Exception as e:
+            if not parser.text:
+                raise
+            # Keep whatever arrived before the stream broke
+            print(f"Analysis stream interrupted, salvaging partial output: {e}")
+        with self.tracer.span("llm.parse"):
+            emit(parser.finish())
+        if shared:
+            self.usage.record("analysis", prompt_text, parser.text, 0.0, cached=True)
+            return dict(parser.completed)
+        self.usage.record("analysis", prompt_text, parser.text, time.monotonic() - started, compacted=compacted)
+
+        if len(parser.completed) == len(categories):
+            self.llm_cache.put(key, "analysis", prompt_hash, parser.completed)
+        elif parser.completed:
+            self.tracer.incr("analysis.salvaged_responses")
+        return dict(parser.completed)
+
+    def _analyze_parallel(self, content: str, url: str,
+                          on_category: Optional[Callable[[str, Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        """Analyze every category with its own concurrent request; a failed category falls back alone."""
+        print(f"Analyzing {len(CATEGORIES)} categories with parallel requests...")
+        analysis, failed = {}, []
+        with ThreadPoolExecutor(max_workers=len(CATEGORIES)) as executor:
+            futures = {executor.submit(self._analyze_category, category, content, url): category
+                       for category in CATEGORIES}
+            for future in as_completed(futures):
+                category = futures[future]
+                try:
+                    analysis[category] = future.result()
+                except Exception as e:
+                    print(f"{category} analysis failed: {e}")
+                    self.tracer.incr("analysis.category_fallbacks")
+                    failed.append(category)
+                    continue
+                if on_category is not None:
+                    on_category(category, analysis[category])
+
+        if not analysis:
+            raise Exception("Analysis failed for every category")
+        for category in failed:
+            analysis[category] = self._fallback_analysis()[category]
+        analysis = {category: analysis[category] for category in CATEGORIES}
+        if failed:
+            analysis["failed_categories"] = [category for category in CATEGORIES if category in failed]
+        return analysis
+
+    def _analyze_category(self, category: str, content: str, url: str) -> Dict[str, Any]:
+        """Run one category's prompt through its own chain, model and cache namespace."""
+        chain = self.category_chains[category]
+        inputs = {
+            "content": content,
+            "url": url,
+            "format_instructions": chain.steps[-1].get_format_instructions()
+        }
+        try:
+            result = self._invoke_chain(category, chain, inputs, budget_field="content",
+                                        model_name=self.category_model_names[category])
+        except OutputParserException as e:
+            self.tracer.incr("analysis.repaired_responses")
+            result = repair_json(e.llm_output or "")
+
+        # Some responses wrap the object in its category name
+        if isinstance(result, dict) and isinstance(result.get(category), dict):
+            result = result[category]
+        parsed = valid_categories({category: result}, [category])
+        if not parsed:
+            raise Exception(f"Could not parse the {category} response")
+        return parsed[category]
+
+    def _analyze_parts(self, parts: List[str], url: str) -> List[Optional[Dict[str, Any]]]:
+        """Analyze several parts of a page concurrently; failed parts come back as None."""
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            futures = [executor.submit(self._analyze_single, part, url) for part in parts]
+
+        results = []
+        for index, future in enumerate(futures, 1):
+            try:
+                results.append(future.result())
+            except Exception as e:
+                print(f"Part {index}/{len(parts)} failed: {e}")
+                self.tracer.incr("analysis.failed_parts")
+                results.append(None)
+        return results
+
+    def _analyze_chunked(self, content: str, url: str) -> Dict[str, Any]:
+        """Map heading-aligned chunks through the analysis chain concurrently and reduce the results."""
+        chunks = pack_chunks(split_sections(content), self.chunk_size)
+        print(f"Analyzing {len(chunks)} chunks with up to {self.max_concurrency} concurrent requests...")
+
+        results = self._analyze_parts(chunks, url)
+        analyses = [result for result in results if result is not None]
+        if not analyses:
+            raise Exception("Analysis failed for every chunk")
+        return merge_analyses(analyses, [len(chunk) for chunk, result in zip(chunks, results) if result is not None])
+
+    def _analyze_incremental(self, content: str, url: str) -> Dict[str, Any]:
+        """Re-analyze only new or changed sections, reusing stored results for the rest."""
+        units = section_units(content, self.min_section_chars)
+        fingerprints = [section_fingerprint(unit.text) for unit in units]
+        prompt_key = self.llm_cache.make_key(self.model_name, self.prompt_hashes["analysis"], {
+            "format_instructions": self.json_parser.get_format_instructions()
+        })
+        stored = self.section_store.get_many(url, fingerprints, prompt_key)
+
+        changed = [i for i, fingerprint in enumerate(fingerprints) if fingerprint not in stored]
+        print(f"Incremental analysis: {len(units) - len(changed)} of {len(units)} sections unchanged, "
+              f"{len(changed)} to analyze...")
+        computed = self._analyze_parts([units[i].text for i in changed], url)
+
+        for i, result in zip(changed, computed):
+            if result is not None:
+                stored[fingerprints[i]] = result
+                # Partial results are used for this run only so the section is retried next time
+                if not self.failed_categories(result):
+                    self.section_store.put(url, fingerprints[i], prompt_key, units[i].heading, result)
+        self.section_store.prune(url, fingerprints)
+
+        self.tracer.incr("sections.reused", len(units) - len(changed))
+        self.last_section_stats = {
+            "sections": len(units),
+            "reused": len(units) - len(changed),
+            "recomputed": sum(1 for result in computed if result is not None),
+            "failed": sum(1 for result in computed if result is None),
+        }
+        print(f"Sections reused: {self.last_section_stats['reused']}, "
+              f"recomputed: {self.last_section_stats['recomputed']}, failed: {self.last_section_stats['failed']}")
+
+        available = [(stored[fp], len(unit.text)) for fp, unit in zip(fingerprints, units) if fp in stored]
+        if not available:
+            raise Exception("Analysis failed for every section")
+        return merge_analyses([analysis for analysis, _ in available], [weight for _, weight in available])
+
+    @staticmethod
+    def _fallback_analysis() -> Dict[str, Any]:
+        """Placeholder result returned when analysis fails; every category is listed as failed."""
+        fallback = {cat: {
+            "score": "Fair",
+            "issues": ["Analysis failed"],
+            "suggestions": ["Please try again"]
+        } for cat in CATEGORIES}
+        fallback["failed_categories"] = list(CATEGORIES)
+        return fallback
+
+    @staticmethod
+    def is_fallback_analysis(analysis: Dict[str, Any]) -> bool:
+        """Whether an analysis is the placeholder returned when the LLM analysis failed."""
+        fallback = DocumentationAnalyzer._fallback_analysis()
+        return all(analysis.get(category) == fallback[category] for category in CATEGORIES)
+
+    @staticmethod
+    def failed_categories(analysis: Dict[str, Any]) -> List[str]:
+        """Categories of an analysis that hold the failure placeholder instead of a real result."""
+        return list(analysis.get("failed_categories", []))
+
+    def _format_feedback(self, analysis: Dict[str, Any]) -> str:
+        """Render the top issues and suggestions of each category for a revision prompt."""
+        feedback_parts = []
+        for category, data in trim_feedback(analysis, self.token_budget.max_feedback_items).items():
+            feedback_parts.extend([
+                f"\n{category.title().replace('_', ' ')} Analysis:",
+                f"Score: {data.get('score', 'N/A')}",
+                "Issues:" if data.get('issues') else "",
+                *[f"- {issue}" for issue in data.get('issues', [])],
+                "Suggestions:" if data.get('suggestions') else "",
+                *[f"- {suggestion}" for suggestion in data.get('suggestions', [])]
+            ])
+        return "\n".join(feedback_parts)
+
+    def _revision_inputs(self, original_content: str, analysis: Dict[str, Any]) -> Dict[str, Any]:
+        """Build the revision prompt inputs from the top issues and suggestions of each category."""
+        return {
+            "original_content": original_content,
+            "feedback": self._format_feedback(analysis)
+        }
+
+    def _revision_sections(self, content: str, mode: Optional[str]) -> Optional[List[Section]]:
+        """Sections to revise separately, or None when the page is revised in one call.
+
+        "sections" always splits, "single" never does, and "auto" splits pages longer than
+        chunk_size that have more than one section.
+        """
+        mode = mode or self.revision_mode
+        if mode == "single":
+            return None
+        units = section_units(content, self.min_section_chars)
+        if mode == "auto" and (len(content) <= self.chunk_size or len(units) < 2):
+            return None
+        return units
+
+    def revise_content(self, original_content: str, analysis: Dict[str, Any], mode: Optional[str] = None) -> str:
+        """Revise content based on analysis; mode overrides the analyzer's revision_mode."""
         try:
             print("Generating revised content...")
-            feedback_parts = []
-            for category, data in analysis.items():
-                feedback_parts.extend([
-                    f"\n{category.title().replace('_', ' ')} Analysis:",
-                    f"Score: {data.get('score', 'N/A')}",
-                    "Issues:" if data.get('issues') else "",
-                    *[f"- {issue}" for issue in data.get('issues', [])],
-                    "Suggestions:" if data.get('suggestions') else "",
-                    *[f"- {suggestion}" for suggestion in data.get('suggestions', [])]
-                ])
-            
-            return self.revision_chain.invoke({
-                "original_content": original_content,
-                "feedback": "\n".join(feedback_parts)
-            })
+            units = self._revision_sections(original_content, mode)
+            if units is not None:
+                return "".join(self._revise_sections(units, analysis))
+            return self._invoke_chain("revision", self.revision_chain,
+                                      self._revision_inputs(original_content, analysis),
+                                      budget_field="original_content")
+        except Exception as e:
+            print(f"Error during revision: {e}")
+            raise
+
+    def stream_revision(self, original_content: str, analysis: Dict[str, Any],
+                        mode: Optional[str] = None) -> Iterator[str]:
+        """Revise content based on analysis, yielding text as the model generates it.
+
+        When sections are revised separately, each section is yielded once it and every
+        section before it are done.
+        """
+        try:
+            units = self._revision_sections(original_content, mode)
+            if units is not None:
+                yield from self._revise_sections(units, analysis)
+                return
+            yield from self._stream_chain("revision", self.revision_chain,
+                                          self._revision_inputs(original_content, analysis),
+                                          budget_field="original_content")
         except Exception as e:
             print(f"Error during revision: {e}")
             raise
 
+    def _revise_sections(self, units: List[Section], analysis: Dict[str, Any]) -> Iterator[str]:
+        """Rewrite sections concurrently and yield them in page order.
+
+        Each section only gets the feedback routed to it plus page-wide feedback. Sections
+        with no routed feedback whose local metrics pass the thresholds are kept without an
+        LLM call, and a section whose rewrite fails keeps its original text.
+        """
+        routed, general = route_feedback(units, analysis)
+        thresholds = replace(self.metric_thresholds, min_words=0)
+        revise = [has_feedback(feedback) or not passes_thresholds(compute_metrics(unit.text), thresholds)
+                  for unit, feedback in zip(units, routed)]
+        title = next((unit.heading for unit in units if unit.heading), "")
+        print(f"Revising {sum(revise)} of {len(units)} sections in parallel "
+              f"({len(units) - sum(revise)} left unchanged)...")
+        self.tracer.incr("revision.sections_rewritten", sum(revise))
+        self.tracer.incr("revision.sections_skipped", len(units) - sum(revise))
+
+        executor = ThreadPoolExecutor(max_workers=self.max_concurrency)
+        failed = 0
+        try:
+            futures = [
+                executor.submit(self._revise_section, title, f"{index + 1} of {len(units)}", unit,
+                                self._section_feedback(feedback, general)) if needed else None
+                for index, (unit, feedback, needed) in enumerate(zip(units, routed, revise))
+            ]
+            for index, (unit, future) in enumerate(zip(units, futures)):
+                text = unit.text
+                if future is not None:
+                    try:
+                        text = future.result()
+                    except Exception as e:
+                        print(f"Revision of section '{unit.heading or index + 1}' failed, keeping the original: {e}")
+                        self.tracer.incr("revision.section_fallbacks")
+                        failed += 1
+                yield ("\n\n" if index else "") + text.strip("\n")
+        finally:
+            executor.shutdown(cancel_futures=True)
+
+        if failed and failed == sum(revise):
+            raise Exception("Revision failed for every section")
+
+    def _section_feedback(self, routed: Dict[str, Any], general: Dict[str, Any]) -> str:
+        """Combine a section's own feedback with page-wide feedback, its own items first."""
+        combined = {category: {
+            "score": data.get('score'),
+            "issues": data['issues'] + general[category]['issues'],
+            "suggestions": data['suggestions'] + general[category]['suggestions'],
+        } for category, data in routed.items()}
+        return self._format_feedback(combined) if has_feedback(combined) else \
+            "No specific issues were found for this section; apply the general guidelines."
+
+    def _revise_section(self, title: str, position: str, unit: Section, feedback: str) -> str:
+        """Rewrite one section through the LLM cache."""
+        inputs = {"title": title, "position": position, "section": unit.text, "feedback": feedback}
+        return self._invoke_chain("section_revision", self.section_revision_chain, inputs, budget_field="section")
+
     def calculate_overall_score(self, analysis: Dict[str, Any]) -> str:
         """Calculate overall score."""
-        scores = []
-        score_values = {'Excellent': 4, 'Good': 3, 'Fair': 2, 'Poor': 1}
-        
-        for category_data in analysis.values():
-            score = category_data.get('score', 'Fair')
-            if score in score_values:
-                scores.append(score_values[score])
-        
-        if not scores:
-            return "Unknown"
-        
-        avg = sum(scores) / len(scores)
-        if avg >= 3.5:
-            return "Excellent"
-        elif avg >= 2.5:
-            return "Good"
-        elif avg >= 1.5:
-            return "Fair"
-        else:
-            return "Poor"
+        return overall_score(analysis)
 
-    def analyze_documentation(self, url: str) -> Dict[str, Any]:
-        """Main method to analyze documentation."""
-        content = self.scrape_page(url)
-        analysis = self.analyze_content(content, url)
+    def analyze_documentation(self, url: str,
+                              on_category: Optional[Callable[[str, Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        """Main method to analyze documentation; on_category receives categories as they complete."""
+        content = self.prepare_content(self.get_page(url).content, url)
+        analysis = self.analyze_content(content, url, on_category=on_category)
         return analysis
 
     def generate_revision(self, url: str, analysis: Dict[str, Any]) -> str:
         """Generate revised content based on analysis."""
-        content = self.scrape_page(url)
-        return self.revise_content(content, analysis) 
\ No newline at end of file
+        content = self.prepare_content(self.get_page(url).content, url)
+        return self.revise_content(content, analysis) 
+
+    def generate_revision_stream(self, url: str, analysis: Dict[str, Any]) -> Iterator[str]:
+        """Stream revised content for a URL as it is generated."""
+        content = self.prepare_content(self.get_page(url).content, url)
+        yield from self.stream_revision(content, analysis)
\ No newline at end of file
@@ -0,0 +1,220 @@
+"""
+Concurrent batch and crawl mode for analyzing many documentation pages.
+"""
+
+import asyncio
+import gzip
+import json
+import os
+import time
+import urllib.request
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Set
+from urllib.parse import urlsplit
+from src.analyzer import DocumentationAnalyzer
+from src.browser import USER_AGENT
+from src.cache import normalize_url
+from src.dedup import BoilerplateFilter
+from src.scraper import ScrapeResult
+from src.utils import save_results
+
+SKIPPED_EXTENSIONS = (
+    '.pdf', '.png', '.jpg', '.jpeg', '.gif', '.svg', '.webp', '.ico', '.zip', '.gz',
+    '.css', '.js', '.json', '.xml', '.txt', '.mp4', '.mp3', '.woff', '.woff2',
+)
+
+def load_url_file(path: str) -> List[str]:
+    """Read URLs from a file, one per line; blank lines and # comments are ignored."""
+    with open(path, 'r', encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip() and not line.strip().startswith('#')]
+
+def load_sitemap(url: str, timeout: float = 30.0) -> List[str]:
+    """Return the page URLs listed in a sitemap, following sitemap indexes."""
+    request = urllib.request.Request(url, headers={'User-Agent': USER_AGENT})
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        data = response.read()
+    if data[:2] == b'\x1f\x8b':
+        data = gzip.decompress(data)
+
+    root = ET.fromstring(data)
+    locations = [el.text.strip() for el in root.iter() if el.tag.endswith('loc') and el.text]
+    if root.tag.endswith('sitemapindex'):
+        urls = []
+        for sitemap_url in locations:
+            try:
+                urls.extend(load_sitemap(sitemap_url, timeout))
+            except Exception as e:
+                print(f"Skipping sitemap {sitemap_url}: {e}")
+        return urls
+    return locations
+
+def is_crawlable(link: str, seed: str) -> bool:
+    """Check that a link stays on the seed's site and looks like an HTML page."""
+    link_parts, seed_parts = urlsplit(link), urlsplit(seed)
+    return (link_parts.scheme in ('http', 'https')
+            and link_parts.hostname == seed_parts.hostname
+            and not link_parts.path.lower().endswith(SKIPPED_EXTENSIONS))
+
+class BatchRunner:
+    """Pipelines page fetches and LLM analysis over many URLs with bounded concurrency."""
+
+    def __init__(self, analyzer: DocumentationAnalyzer, fetch_concurrency: int = 4, llm_concurrency: int = 4,
+                 revise: bool = False, crawl: bool = False, max_pages: Optional[int] = None,
+                 state_path: Optional[str] = None, resume: bool = False, strip_boilerplate: bool = True):
+        """Configure the pipeline; state_path records finished URLs so a run can resume."""
+        self.analyzer = analyzer
+        self.fetch_concurrency = fetch_concurrency
+        self.llm_concurrency = llm_concurrency
+        self.revise = revise
+        self.crawl = crawl
+        self.max_pages = max_pages
+        self.boilerplate_filter = BoilerplateFilter() if strip_boilerplate else None
+        self.state_path = state_path or os.path.join(os.path.dirname(__file__), '..', 'output', 'batch_state.jsonl')
+        self.completed: Dict[str, Dict[str, Any]] = self._load_state() if resume else {}
+        if not resume and os.path.exists(self.state_path):
+            os.remove(self.state_path)
+
+        self.stats = {"analyzed": 0, "partial": 0, "failed": 0, "skipped": 0}
+        self._seen: Set[str] = set()
+        self._seeds: List[str] = []
+
+    def run(self, urls: List[str]) -> Dict[str, Any]:
+        """Analyze every URL (and, when crawling, every same-site page reachable from them)."""
+        return asyncio.run(self._run(urls))
+
+    async def _run(self, urls: List[str]) -> Dict[str, Any]:
+        """Start the fetch and analysis stages and wait for the frontier to drain."""
+        loop = asyncio.get_running_loop()
+        loop.set_default_executor(ThreadPoolExecutor(max_workers=self.fetch_concurrency + self.llm_concurrency))
+
+        self._fetch_queue: asyncio.Queue = asyncio.Queue()
+        # Bounded so fetching cannot run arbitrarily far ahead of the LLM stage
+        self._analysis_queue: asyncio.Queue = asyncio.Queue(maxsize=self.llm_concurrency * 2)
+        self._seeds = list(urls)
+        for url in urls:
+            self._admit(url)
+
+        started = time.monotonic()
+        workers = [asyncio.create_task(self._fetch_worker()) for _ in range(self.fetch_concurrency)]
+        workers += [asyncio.create_task(self._analysis_worker()) for _ in range(self.llm_concurrency)]
+        await self._fetch_queue.join()
+        await self._analysis_queue.join()
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+        elapsed = time.monotonic() - started
+        self.stats["elapsed_seconds"] = round(elapsed, 2)
+        self.stats["pages_per_minute"] = round(self.stats["analyzed"] / elapsed * 60, 2) if elapsed else 0.0
+        self.stats["tokens_saved_by_dedup"] = self.analyzer.dedup_stats["tokens_saved"]
+        return self.stats
+
+    def _admit(self, url: str):
+        """Add a URL to the frontier unless it was already seen or finished in a previous run."""
+        pending = [url]
+        while pending:
+            url = pending.pop()
+            key = normalize_url(url)
+            if key in self._seen:
+                continue
+            if self.max_pages is not None and len(self._seen) >= self.max_pages:
+                return
+            self._seen.add(key)
+
+            if key in self.completed:
+                self.stats["skipped"] += 1
+                if self.crawl:
+                    pending.extend(self._crawlable(self.completed[key].get("links", [])))
+                continue
+            self._fetch_queue.put_nowait(url)
+
+    def _crawlable(self, links: List[str]) -> List[str]:
+        """Filter links down to those on the same site as one of the seeds."""
+        return [link for link in links if any(is_crawlable(link, seed) for seed in self._seeds)]
+
+    async def _fetch_worker(self):
+        """Fetch pages through the scrape cache and hand them to the analysis stage."""
+        while True:
+            url = await self._fetch_queue.get()
+            try:
+                page = await asyncio.to_thread(self.analyzer.get_page, url)
+                if self.crawl:
+                    for link in self._crawlable(page.links):
+                        self._admit(link)
+                await self._analysis_queue.put((url, page))
+            except Exception as e:
+                self._record(url, "error", error=str(e))
+            finally:
+                self._fetch_queue.task_done()
+
+    async def _analysis_worker(self):
+        """Analyze fetched pages, optionally revise them, and save one result per URL."""
+        while True:
+            url, page = await self._analysis_queue.get()
+            try:
+                await self._analyze_page(url, page)
+            except Exception as e:
+                self._record(url, "error", error=str(e))
+            finally:
+                self._analysis_queue.task_done()
+
+    async def _analyze_page(self, url: str, page: ScrapeResult):
+        """Run the LLM stage for one page and persist its result."""
+        content = await asyncio.to_thread(self.analyzer.prepare_content, page.content, url, self.boilerplate_filter)
+        analysis = await asyncio.to_thread(self.analyzer.analyze_content, content, url)
+        failed = self.analyzer.failed_categories(analysis)
+        if failed and not self.analyzer.is_fallback_analysis(analysis):
+            print(f"Analysis of {url} failed for {', '.join(failed)}; retrying")
+            analysis = await asyncio.to_thread(self.analyzer.analyze_content, content, url)
+            failed = self.analyzer.failed_categories(analysis)
+        if self.analyzer.is_fallback_analysis(analysis):
+            # Recorded as an error so --resume retries the page instead of keeping placeholder scores
+            raise Exception("LLM analysis failed")
+        revised_content = None
+        if self.revise:
+            revised_content = await asyncio.to_thread(self.analyzer.revise_content, content, analysis)
+        analysis_id = await asyncio.to_thread(save_results, url, analysis, revised_content)
+        # Partial results are stored, but only complete ones are skipped by --resume
+        self._record(url, "partial" if failed else "ok", analysis_id=analysis_id,
+                     links=page.links if self.crawl else [],
+                     overall_score=self.analyzer.calculate_overall_score(analysis),
+                     **({"failed_categories": failed} if failed else {}))
+
+    def _record(self, url: str, status: str, **details):
+        """Append a URL's outcome to the state file and update the counters."""
+        entry = {"url": url, "status": status, "finished_at": time.time(), **details}
+        if status == "ok":
+            self.stats["analyzed"] += 1
+            self.completed[normalize_url(url)] = entry
+        elif status == "partial":
+            self.stats["analyzed"] += 1
+            self.stats["partial"] += 1
+            print(f"Partial result for {url}; failed categories: {', '.join(details['failed_categories'])}")
+        else:
+            self.stats["failed"] += 1
+            print(f"Failed {url}: {details.get('error')}")
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.state_path)), exist_ok=True)
+        with open(self.state_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+        done = self.stats["analyzed"] + self.stats["failed"]
+        print(f"[{done}/{len(self._seen) - self.stats['skipped']}] {status}: {url}")
+
+    def _load_state(self) -> Dict[str, Dict[str, Any]]:
+        """Load URLs finished successfully by an earlier, interrupted run."""
+        completed = {}
+        if not os.path.exists(self.state_path):
+            return completed
+        with open(self.state_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # A line cut short by the interruption
+                    continue
+                if entry.get("status") == "ok":
+                    completed[normalize_url(entry["url"])] = entry
+        print(f"Resuming: {len(completed)} URLs already analyzed")
+        return completed
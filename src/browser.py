@@ -0,0 +1,177 @@
+"""
+Pooled headless Chrome sessions shared by the CLI and the Streamlit app.
+"""
+
+import atexit
+import os
+import queue
+import threading
+from contextlib import contextmanager
+from typing import Iterator, List, Optional
+import psutil
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from src.telemetry import get_tracer
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+
+def build_chrome_options() -> Options:
+    """Build the headless Chrome options used for scraping."""
+    options = Options()
+    options.add_argument('--headless')
+    options.add_argument('--disable-gpu')
+    options.add_argument('--window-size=1920,1080')
+    options.add_argument('--no-sandbox')
+    options.add_argument('--disable-dev-shm-usage')
+    options.add_argument('--disable-blink-features=AutomationControlled')
+    options.add_experimental_option("excludeSwitches", ["enable-automation"])
+    options.add_experimental_option('useAutomationExtension', False)
+    options.add_argument(f'--user-agent={USER_AGENT}')
+    return options
+
+class PooledDriver:
+    """A Chrome driver together with its usage bookkeeping."""
+
+    def __init__(self, driver: webdriver.Chrome):
+        self.driver = driver
+        self.pages = 0
+
+class BrowserPool:
+    """Keeps a bounded number of warm Chrome drivers alive across scrapes."""
+
+    def __init__(self, size: int = 2, max_pages_per_driver: int = 50,
+                 max_memory_mb: int = 1024, lease_timeout: float = 300.0):
+        """Configure the pool; drivers are launched lazily on first lease."""
+        self.size = size
+        self.max_pages_per_driver = max_pages_per_driver
+        self.max_memory_mb = max_memory_mb
+        self.lease_timeout = lease_timeout
+
+        self._idle: "queue.LifoQueue[PooledDriver]" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._drivers: List[PooledDriver] = []
+        self._closed = False
+
+    @contextmanager
+    def lease(self) -> Iterator[webdriver.Chrome]:
+        """Lease a healthy driver for the duration of one scrape."""
+        if self._closed:
+            raise Exception("Browser pool has been shut down")
+        if not self._slots.acquire(timeout=self.lease_timeout):
+            raise Exception("Timed out waiting for a browser session")
+
+        pooled = None
+        try:
+            pooled = self._checkout()
+            yield pooled.driver
+        finally:
+            if pooled is not None:
+                self._checkin(pooled)
+            self._slots.release()
+
+    def close(self):
+        """Quit every driver owned by the pool."""
+        with self._lock:
+            self._closed = True
+            drivers = list(self._drivers)
+            self._drivers.clear()
+        for pooled in drivers:
+            self._quit(pooled)
+
+    def _checkout(self) -> PooledDriver:
+        """Return a warm driver that passes the health check, launching one if needed."""
+        while True:
+            try:
+                pooled = self._idle.get_nowait()
+            except queue.Empty:
+                return self._launch()
+            if self._is_healthy(pooled):
+                get_tracer().incr("browser.reused")
+                return pooled
+            get_tracer().incr("browser.unhealthy_retired")
+            self._retire(pooled)
+
+    def _checkin(self, pooled: PooledDriver):
+        """Return a driver to the pool, or recycle it when it is worn out."""
+        pooled.pages += 1
+        if self._closed or pooled.pages >= self.max_pages_per_driver or self._memory_mb(pooled) > self.max_memory_mb:
+            get_tracer().incr("browser.recycled")
+            self._retire(pooled)
+            return
+
+        try:
+            # Drop the previous page so its DOM does not linger between leases
+            pooled.driver.get("about:blank")
+        except Exception:
+            self._retire(pooled)
+            return
+        self._idle.put(pooled)
+
+    def _launch(self) -> PooledDriver:
+        """Start a new headless Chrome driver."""
+        print("Launching headless Chrome session...")
+        with get_tracer().span("browser.launch"):
+            pooled = PooledDriver(webdriver.Chrome(options=build_chrome_options()))
+        with self._lock:
+            self._drivers.append(pooled)
+        return pooled
+
+    def _retire(self, pooled: PooledDriver):
+        """Remove a driver from the pool and quit it."""
+        with self._lock:
+            if pooled in self._drivers:
+                self._drivers.remove(pooled)
+        self._quit(pooled)
+
+    @staticmethod
+    def _is_healthy(pooled: PooledDriver) -> bool:
+        """Check that the browser still answers script calls."""
+        try:
+            return pooled.driver.execute_script("return 1") == 1
+        except Exception:
+            return False
+
+    @staticmethod
+    def _memory_mb(pooled: PooledDriver) -> float:
+        """Return the resident memory of chromedriver and every Chrome process it started, in megabytes.
+
+        Unlike the JS heap of the current page, this keeps growing across navigations.
+        """
+        try:
+            root = psutil.Process(pooled.driver.service.process.pid)
+            processes = [root] + root.children(recursive=True)
+        except Exception:
+            return 0.0
+        total = 0
+        for process in processes:
+            try:
+                total += process.memory_info().rss
+            except psutil.Error:
+                # The process exited between listing and measuring it
+                continue
+        return total / (1024 * 1024)
+
+    @staticmethod
+    def _quit(pooled: PooledDriver):
+        """Quit a driver, ignoring errors from already-dead sessions."""
+        try:
+            pooled.driver.quit()
+        except Exception:
+            pass
+
+_shared_pool: Optional[BrowserPool] = None
+_shared_pool_lock = threading.Lock()
+
+def get_browser_pool() -> BrowserPool:
+    """Return the process-wide browser pool, creating it from the environment on first use."""
+    global _shared_pool
+    with _shared_pool_lock:
+        if _shared_pool is None:
+            _shared_pool = BrowserPool(
+                size=int(os.getenv('BROWSER_POOL_SIZE', '2')),
+                max_pages_per_driver=int(os.getenv('BROWSER_MAX_PAGES', '50')),
+                max_memory_mb=int(os.getenv('BROWSER_MAX_MEMORY_MB', '1024')),
+            )
+            atexit.register(_shared_pool.close)
+        return _shared_pool
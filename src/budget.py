@@ -0,0 +1,168 @@
+"""
+Token budgeting, prompt compaction and per-call usage accounting.
+"""
+
+import json
+import math
+import re
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Tuple
+from src.models import CATEGORIES
+from src.sections import HEADING_PATTERN
+
+# Gemini averages roughly four characters per token on English prose
+CHARS_PER_TOKEN = 4
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the token count of a piece of text."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+@dataclass
+class TokenBudget:
+    """Limits applied to every prompt before it is sent."""
+    max_input_tokens: int = 30000
+    max_feedback_items: int = 5
+    min_block_words: int = 4
+
+@dataclass
+class CompactionReport:
+    """How much a prompt input was shrunk to fit its budget."""
+    tokens_before: int = 0
+    tokens_after: int = 0
+    blocks_dropped: int = 0
+    truncated: bool = False
+
+def _collapse_whitespace(content: str) -> List[str]:
+    """Collapse runs of whitespace in prose lines and drop blank lines; code is left intact."""
+    lines, in_code = [], False
+    for line in content.split('\n'):
+        if line.startswith('```'):
+            in_code = not in_code
+            lines.append(line.strip())
+        elif in_code:
+            lines.append(line.rstrip())
+        elif line.strip():
+            lines.append(" ".join(line.split()))
+    return lines
+
+def _is_low_value(line: str, min_words: int) -> bool:
+    """Short fragments without sentence punctuation: link labels, breadcrumbs, button text."""
+    if HEADING_PATTERN.match(line) or line.startswith('```'):
+        return False
+    text = line[2:] if line.startswith('- ') else line
+    return (len(text.split()) < min_words and not re.search(r'[.:!?]$', text)) or not re.search(r'[A-Za-z]', text)
+
+def compact_content(content: str, max_tokens: int, min_block_words: int = 4) -> Tuple[str, CompactionReport]:
+    """Shrink content to max_tokens: collapse whitespace, drop low-value blocks, then truncate."""
+    report = CompactionReport(tokens_before=estimate_tokens(content))
+    if report.tokens_before <= max_tokens:
+        report.tokens_after = report.tokens_before
+        return content, report
+
+    lines = _collapse_whitespace(content)
+    compacted = "\n".join(lines)
+
+    if estimate_tokens(compacted) > max_tokens:
+        in_code, kept = False, []
+        for line in lines:
+            if line.startswith('```'):
+                in_code = not in_code
+            if not in_code and _is_low_value(line, min_block_words):
+                report.blocks_dropped += 1
+                continue
+            kept.append(line)
+        lines = kept
+        compacted = "\n".join(lines)
+
+    if estimate_tokens(compacted) > max_tokens:
+        limit = max_tokens * CHARS_PER_TOKEN
+        kept, size = [], 0
+        for line in lines:
+            if size + len(line) + 1 > limit:
+                break
+            kept.append(line)
+            size += len(line) + 1
+        report.truncated = True
+        report.blocks_dropped += len(lines) - len(kept)
+        compacted = "\n".join(kept + [f"[... {len(lines) - len(kept)} more lines omitted to fit the token budget ...]"])
+
+    report.tokens_after = estimate_tokens(compacted)
+    return compacted, report
+
+def trim_feedback(analysis: Dict[str, Any], max_items: int) -> Dict[str, Any]:
+    """Keep only the first max_items issues and suggestions of each category; failed categories are dropped."""
+    trimmed = {}
+    failed = set(analysis.get('failed_categories', []))
+    for category in CATEGORIES:
+        data = analysis.get(category)
+        if not data or category in failed:
+            continue
+        trimmed[category] = {
+            "score": data.get('score', 'N/A'),
+            "issues": list(data.get('issues', []))[:max_items],
+            "suggestions": list(data.get('suggestions', []))[:max_items],
+        }
+    return trimmed
+
+@dataclass
+class CallRecord:
+    """Token usage and latency of one LLM call."""
+    name: str
+    input_tokens: int
+    output_tokens: int
+    latency_seconds: float
+    cached: bool = False
+    compacted: bool = False
+    started_at: float = field(default_factory=time.time)
+
+class UsageReport:
+    """Thread-safe log of LLM calls with throughput summaries."""
+
+    def __init__(self):
+        """Start an empty report."""
+        self._lock = threading.Lock()
+        self.records: List[CallRecord] = []
+
+    def record(self, name: str, prompt_text: str, output: Any, latency_seconds: float,
+               cached: bool = False, compacted: bool = False) -> CallRecord:
+        """Log one call, estimating input and output tokens from the prompt and response."""
+        output_text = output if isinstance(output, str) else json.dumps(output, ensure_ascii=False)
+        entry = CallRecord(name, estimate_tokens(prompt_text), estimate_tokens(output_text),
+                           round(latency_seconds, 3), cached, compacted, time.time() - latency_seconds)
+        with self._lock:
+            self.records.append(entry)
+        return entry
+
+    def summary(self) -> Dict[str, Any]:
+        """Aggregate token totals, latency and quota-relevant throughput over live (uncached) calls."""
+        with self._lock:
+            records = list(self.records)
+        live = [r for r in records if not r.cached]
+        span = (max(r.started_at + r.latency_seconds for r in live) - min(r.started_at for r in live)) if live else 0.0
+        latencies = sorted(r.latency_seconds for r in live)
+        input_tokens = sum(r.input_tokens for r in live)
+        output_tokens = sum(r.output_tokens for r in live)
+        return {
+            "calls": len(records),
+            "cached_calls": len(records) - len(live),
+            "compacted_calls": sum(1 for r in records if r.compacted),
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "avg_latency_seconds": round(sum(latencies) / len(latencies), 3) if latencies else 0.0,
+            "p95_latency_seconds": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] if latencies else 0.0,
+            "requests_per_minute": round(len(live) / span * 60, 2) if span else 0.0,
+            "tokens_per_minute": round((input_tokens + output_tokens) / span * 60, 1) if span else 0.0,
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the summary together with every call record."""
+        with self._lock:
+            records = [asdict(r) for r in self.records]
+        return {"summary": self.summary(), "calls": records}
+
+    def save(self, path: str):
+        """Write the report as JSON."""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2)
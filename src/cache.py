@@ -0,0 +1,261 @@
+"""
+Persistent SQLite-backed caches for scraped pages and LLM responses.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+from src.scraper import ScrapeResult
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+def default_cache_dir() -> str:
+    """Return the cache directory, overridable with DOCUMETRICS_CACHE_DIR."""
+    return os.getenv('DOCUMETRICS_CACHE_DIR') or os.path.join(os.path.dirname(__file__), '..', '.cache')
+
+def normalize_url(url: str) -> str:
+    """Normalize a URL so equivalent spellings share one cache entry."""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    path = parts.path or '/'
+    if len(path) > 1:
+        path = path.rstrip('/')
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, host, path, query, ''))
+
+def content_hash(content: str) -> str:
+    """Return a stable fingerprint for extracted content."""
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+class SQLiteCache:
+    """Shared connection handling for the on-disk caches."""
+
+    def __init__(self, path: str):
+        """Open (and create if needed) the cache database."""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+
+    def close(self):
+        """Close the underlying connection."""
+        with self._lock:
+            self._conn.close()
+
+    def _evict(self, table: str, max_entries: int, max_bytes: int) -> int:
+        """Drop least recently used rows until the count and size limits hold."""
+        count, total = self._conn.execute(f"SELECT COUNT(*), COALESCE(SUM(size), 0) FROM {table}").fetchone()
+        if count <= max_entries and total <= max_bytes:
+            return 0
+        rows = self._conn.execute(f"SELECT rowid, size FROM {table} ORDER BY last_access ASC").fetchall()
+        evicted = []
+        for rowid, size in rows:
+            if count <= max_entries and total <= max_bytes:
+                break
+            evicted.append((rowid,))
+            count -= 1
+            total -= size
+        self._conn.executemany(f"DELETE FROM {table} WHERE rowid = ?", evicted)
+        return len(evicted)
+
+class ScrapeCache(SQLiteCache):
+    """Scraped page content keyed by normalized URL, with TTL and LRU eviction."""
+
+    def __init__(self, path: Optional[str] = None, ttl_seconds: float = 6 * 3600,
+                 max_entries: int = 2000, max_bytes: int = 200 * 1024 * 1024):
+        """Open the cache; limits bound the number and total size of entries."""
+        super().__init__(path or os.path.join(default_cache_dir(), 'scrape_cache.db'))
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        with self._lock, self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS pages (
+                    url_key TEXT PRIMARY KEY,
+                    url TEXT NOT NULL,
+                    content TEXT NOT NULL,
+                    content_hash TEXT NOT NULL,
+                    tier TEXT NOT NULL,
+                    etag TEXT,
+                    last_modified TEXT,
+                    fetched_at REAL NOT NULL,
+                    last_access REAL NOT NULL,
+                    size INTEGER NOT NULL,
+                    links TEXT
+                )
+            """)
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(pages)")}
+            if 'links' not in columns:
+                self._conn.execute("ALTER TABLE pages ADD COLUMN links TEXT")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS pages_last_access ON pages(last_access)")
+
+    def get(self, url: str) -> Optional[ScrapeResult]:
+        """Return the cached entry for a URL, fresh or stale, or None."""
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT url, content, content_hash, tier, etag, last_modified, fetched_at, links FROM pages WHERE url_key = ?",
+                (normalize_url(url),)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE pages SET last_access = ? WHERE url_key = ?", (time.time(), normalize_url(url)))
+        return ScrapeResult(url=row[0], content=row[1], tier=row[3], content_hash=row[2],
+                            etag=row[4], last_modified=row[5], fetched_at=row[6], links=json.loads(row[7] or '[]'))
+
+    def is_fresh(self, entry: ScrapeResult) -> bool:
+        """Check whether an entry is still within its TTL."""
+        return entry.fetched_at is not None and time.time() - entry.fetched_at < self.ttl_seconds
+
+    def put(self, result: ScrapeResult):
+        """Store a scrape result and evict least recently used entries over the limits."""
+        now = time.time()
+        result.content_hash = content_hash(result.content)
+        result.fetched_at = result.fetched_at or now
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages "
+                "(url_key, url, content, content_hash, tier, etag, last_modified, fetched_at, last_access, size, links) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (normalize_url(result.url), result.url, result.content, result.content_hash, result.tier,
+                 result.etag, result.last_modified, result.fetched_at, now, len(result.content.encode('utf-8')),
+                 json.dumps(result.links))
+            )
+            self._evict('pages', self.max_entries, self.max_bytes)
+
+    def touch(self, url: str):
+        """Mark an entry as freshly validated without changing its content."""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE pages SET fetched_at = ?, last_access = ? WHERE url_key = ?",
+                               (now, now, normalize_url(url)))
+
+class LLMCache(SQLiteCache):
+    """Persistent LLM responses keyed by model, prompt template and inputs."""
+
+    def __init__(self, path: Optional[str] = None, max_entries: int = 5000,
+                 max_bytes: int = 100 * 1024 * 1024):
+        """Open the cache; limits bound the number and total size of responses."""
+        super().__init__(path or os.path.join(default_cache_dir(), 'llm_cache.db'))
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        with self._lock, self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    prompt_name TEXT NOT NULL,
+                    prompt_hash TEXT NOT NULL,
+                    response TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL,
+                    size INTEGER NOT NULL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS responses_last_access ON responses(last_access)")
+
+    @staticmethod
+    def make_key(model: str, prompt_hash: str, inputs: Dict[str, Any]) -> str:
+        """Hash everything that determines a response into a cache key."""
+        payload = json.dumps({"model": model, "prompt": prompt_hash, "inputs": inputs},
+                             sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached response for a key, or None on a miss."""
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT response FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (time.time(), key))
+            self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, key: str, prompt_name: str, prompt_hash: str, response: Any):
+        """Store a response and evict least recently used entries over the limits."""
+        now = time.time()
+        payload = json.dumps(response, ensure_ascii=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, prompt_name, prompt_hash, payload, now, now, len(payload.encode('utf-8')))
+            )
+            self.evictions += self._evict('responses', self.max_entries, self.max_bytes)
+
+    def invalidate_prompt(self, prompt_name: str, prompt_hash: str) -> int:
+        """Drop responses produced by any other version of a prompt template."""
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "DELETE FROM responses WHERE prompt_name = ? AND prompt_hash != ?", (prompt_name, prompt_hash)
+            )
+        return cursor.rowcount
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters for this process and the current cache size."""
+        with self._lock:
+            entries, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": entries,
+            "bytes": size,
+        }
+
+class SectionStore(SQLiteCache):
+    """Per-section analysis results for each URL, keyed by section fingerprint."""
+
+    def __init__(self, path: Optional[str] = None):
+        """Open (and create if needed) the section store."""
+        super().__init__(path or os.path.join(default_cache_dir(), 'sections.db'))
+        with self._lock, self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS section_results (
+                    url_key TEXT NOT NULL,
+                    fingerprint TEXT NOT NULL,
+                    prompt_key TEXT NOT NULL,
+                    heading TEXT,
+                    analysis TEXT NOT NULL,
+                    updated_at REAL NOT NULL,
+                    PRIMARY KEY (url_key, fingerprint)
+                )
+            """)
+
+    def get_many(self, url: str, fingerprints: List[str], prompt_key: str) -> Dict[str, Dict[str, Any]]:
+        """Return stored analyses for the given fingerprints produced with the current prompt."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT fingerprint, analysis FROM section_results WHERE url_key = ? AND prompt_key = ?",
+                (normalize_url(url), prompt_key)
+            ).fetchall()
+        wanted = set(fingerprints)
+        return {fingerprint: json.loads(analysis) for fingerprint, analysis in rows if fingerprint in wanted}
+
+    def put(self, url: str, fingerprint: str, prompt_key: str, heading: str, analysis: Dict[str, Any]):
+        """Store the analysis of one section."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO section_results VALUES (?, ?, ?, ?, ?, ?)",
+                (normalize_url(url), fingerprint, prompt_key, heading, json.dumps(analysis, ensure_ascii=False), time.time())
+            )
+
+    def prune(self, url: str, keep: List[str]):
+        """Forget sections that no longer exist on the page."""
+        with self._lock, self._conn:
+            rows = self._conn.execute("SELECT fingerprint FROM section_results WHERE url_key = ?",
+                                      (normalize_url(url),)).fetchall()
+            stale = [(normalize_url(url), row[0]) for row in rows if row[0] not in set(keep)]
+            self._conn.executemany("DELETE FROM section_results WHERE url_key = ? AND fingerprint = ?", stale)
@@ -0,0 +1,209 @@
+"""
+Exact and near-duplicate block removal (shingling + MinHash/LSH) for scraped content.
+"""
+
+import hashlib
+import re
+import threading
+import zlib
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set, Tuple
+import numpy as np
+from src.sections import HEADING_PATTERN
+
+MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+LIST_ITEM_PATTERN = re.compile(r'^\s*(?:[-*+•]|\d+[.)])\s')
+
+@dataclass
+class DedupReport:
+    """What a deduplication pass removed."""
+    blocks: int = 0
+    exact_duplicates: int = 0
+    near_duplicates: int = 0
+    boilerplate: int = 0
+    bytes_saved: int = 0
+
+    @property
+    def removed(self) -> int:
+        """Total number of blocks dropped."""
+        return self.exact_duplicates + self.near_duplicates + self.boilerplate
+
+    @property
+    def tokens_saved(self) -> int:
+        """Rough token estimate at four characters per token."""
+        return self.bytes_saved // 4
+
+def split_blocks(content: str) -> List[str]:
+    """Split content into line blocks, keeping fenced code blocks whole."""
+    blocks, code = [], None
+    for line in content.split('\n'):
+        if code is not None:
+            code.append(line)
+            if line.startswith('```'):
+                blocks.append("\n".join(code))
+                code = None
+        elif line.startswith('```'):
+            code = [line]
+        else:
+            blocks.append(line)
+    if code is not None:
+        blocks.append("\n".join(code))
+    return blocks
+
+def _is_prose(block: str) -> bool:
+    """Whether a block is prose that may be dropped; headings, code and list items are always kept.
+
+    Repeated code samples and list items are usually deliberate, and the prepared content
+    is also what gets revised.
+    """
+    return not (HEADING_PATTERN.match(block) or block.startswith('```') or LIST_ITEM_PATTERN.match(block))
+
+def _normalize(block: str) -> str:
+    """Lowercase and collapse whitespace so trivial differences do not matter."""
+    return " ".join(block.lower().split())
+
+def _exact_key(block: str) -> str:
+    """Hash of the normalized block."""
+    return hashlib.blake2b(_normalize(block).encode('utf-8'), digest_size=16).hexdigest()
+
+class MinHasher:
+    """MinHash signatures over word shingles, with LSH banding for candidate lookup."""
+
+    def __init__(self, num_perm: int = 128, bands: int = 16, shingle_size: int = 3, seed: int = 7):
+        """Draw the hash permutations; num_perm must be divisible by bands."""
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        rng = np.random.default_rng(seed)
+        self.a = rng.integers(1, 1 << 32, size=num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, 1 << 32, size=num_perm, dtype=np.uint64)
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+
+    def signature(self, block: str) -> np.ndarray:
+        """Return the MinHash signature of a block's word shingles."""
+        words = _normalize(block).split()
+        size = min(self.shingle_size, len(words))
+        shingles = {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+        hashes = np.fromiter((zlib.crc32(s.encode('utf-8')) for s in shingles), dtype=np.uint64, count=len(shingles))
+        # (a * x + b) mod p for every permutation and shingle at once; a, b, x < 2**32 so nothing overflows
+        permuted = (np.outer(self.a, hashes) + self.b[:, None]) % MERSENNE_PRIME
+        return permuted.min(axis=1)
+
+    def band_keys(self, signature: np.ndarray) -> List[Tuple[int, bytes]]:
+        """Split a signature into LSH band keys."""
+        return [(band, signature[band * self.rows:(band + 1) * self.rows].tobytes()) for band in range(self.bands)]
+
+    @staticmethod
+    def similarity(left: np.ndarray, right: np.ndarray) -> float:
+        """Estimate Jaccard similarity from two signatures."""
+        return float((left == right).mean())
+
+class Deduplicator:
+    """Drops repeated paragraphs within a page, keeping the first occurrence."""
+
+    def __init__(self, threshold: float = 0.8, min_exact_chars: int = 20, min_near_words: int = 8,
+                 hasher: Optional[MinHasher] = None):
+        """Blocks shorter than the minimums are only compared exactly, or not at all."""
+        self.threshold = threshold
+        self.min_exact_chars = min_exact_chars
+        self.min_near_words = min_near_words
+        self.hasher = hasher or MinHasher()
+
+    def deduplicate(self, content: str) -> Tuple[str, DedupReport]:
+        """Return content without duplicate blocks and a report of what was removed."""
+        report = DedupReport()
+        seen_exact: Set[str] = set()
+        buckets: Dict[Tuple[int, bytes], List[int]] = defaultdict(list)
+        signatures: List[np.ndarray] = []
+        kept = []
+
+        for block in split_blocks(content):
+            report.blocks += 1
+            if not self._comparable(block):
+                kept.append(block)
+                continue
+
+            key = _exact_key(block)
+            if key in seen_exact:
+                report.exact_duplicates += 1
+                report.bytes_saved += len(block.encode('utf-8')) + 1
+                continue
+            seen_exact.add(key)
+
+            if len(block.split()) >= self.min_near_words:
+                signature = self.hasher.signature(block)
+                band_keys = self.hasher.band_keys(signature)
+                candidates = {index for band_key in band_keys for index in buckets.get(band_key, [])}
+                if any(self.hasher.similarity(signature, signatures[i]) >= self.threshold for i in candidates):
+                    report.near_duplicates += 1
+                    report.bytes_saved += len(block.encode('utf-8')) + 1
+                    continue
+                for band_key in band_keys:
+                    buckets[band_key].append(len(signatures))
+                signatures.append(signature)
+
+            kept.append(block)
+
+        return "\n".join(kept), report
+
+    def _comparable(self, block: str) -> bool:
+        """Only prose blocks of at least min_exact_chars are treated as duplicates."""
+        return len(block.strip()) >= self.min_exact_chars and _is_prose(block)
+
+class BoilerplateFilter:
+    """Learns blocks repeated across pages of a batch and strips them from later pages."""
+
+    def __init__(self, min_pages: int = 3, threshold: float = 0.8, min_words: int = 3,
+                 hasher: Optional[MinHasher] = None):
+        """A block counts as boilerplate once it has been seen on min_pages distinct pages."""
+        self.min_pages = min_pages
+        self.threshold = threshold
+        self.min_words = min_words
+        self.hasher = hasher or MinHasher()
+        self._lock = threading.Lock()
+        self._pages: List[Set[str]] = []
+        self._block_pages: Dict[int, Set[str]] = defaultdict(set)
+        self._buckets: Dict[Tuple[int, bytes], List[int]] = defaultdict(list)
+        self._signatures: List[np.ndarray] = []
+        self._exact: Dict[str, int] = {}
+
+    def filter(self, content: str, page_id: str) -> Tuple[str, DedupReport]:
+        """Record a page's blocks and remove the ones already known to be site-wide boilerplate."""
+        report = DedupReport()
+        kept = []
+        with self._lock:
+            for block in split_blocks(content):
+                report.blocks += 1
+                if not _is_prose(block) or len(block.split()) < self.min_words:
+                    kept.append(block)
+                    continue
+                index = self._block_index(block)
+                self._block_pages[index].add(page_id)
+                if len(self._block_pages[index]) >= self.min_pages:
+                    report.boilerplate += 1
+                    report.bytes_saved += len(block.encode('utf-8')) + 1
+                    continue
+                kept.append(block)
+        return "\n".join(kept), report
+
+    def _block_index(self, block: str) -> int:
+        """Return the id of the matching known block, registering the block if it is new."""
+        key = _exact_key(block)
+        if key in self._exact:
+            return self._exact[key]
+
+        signature = self.hasher.signature(block)
+        band_keys = self.hasher.band_keys(signature)
+        for candidate in {i for band_key in band_keys for i in self._buckets.get(band_key, [])}:
+            if self.hasher.similarity(signature, self._signatures[candidate]) >= self.threshold:
+                self._exact[key] = candidate
+                return candidate
+
+        index = len(self._signatures)
+        self._signatures.append(signature)
+        for band_key in band_keys:
+            self._buckets[band_key].append(index)
+        self._exact[key] = index
+        return index
@@ -0,0 +1,173 @@
+"""
+Process-wide background jobs for analyses and revisions, shared by every app session.
+"""
+
+import hashlib
+import json
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from src.analyzer import DocumentationAnalyzer
+from src.cache import normalize_url
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+@dataclass
+class Job:
+    """State of one background analysis or revision.
+
+    partial holds the revision text generated so far; categories holds the analysis
+    categories completed so far.
+    """
+    id: str
+    kind: str
+    url: str
+    status: str = QUEUED
+    stage: str = "Waiting for a worker"
+    partial: str = ""
+    categories: Dict[str, Any] = field(default_factory=dict)
+    result: Any = None
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    submitters: int = 1
+
+    @property
+    def finished(self) -> bool:
+        """Whether the job has completed, successfully or not."""
+        return self.status in (DONE, FAILED)
+
+class JobManager:
+    """Runs analyses and revisions on a bounded worker pool around one shared analyzer.
+
+    Submitting the same kind of job for the same URL (and options) while an earlier one
+    is still queued or running returns the earlier job's ID instead of starting a new one.
+    """
+
+    def __init__(self, analyzer: DocumentationAnalyzer, max_workers: int = 4,
+                 retention_seconds: float = 3600, max_jobs: int = 500):
+        """Finished jobs are kept for retention_seconds, up to max_jobs in total."""
+        self.analyzer = analyzer
+        self.retention_seconds = retention_seconds
+        self.max_jobs = max_jobs
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="documetrics-job")
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, Job] = {}
+        self._active: Dict[Tuple[str, ...], str] = {}
+
+    def submit_analysis(self, url: str, fast_mode: Optional[bool] = None) -> str:
+        """Queue an analysis of url and return its job ID."""
+        key = ("analysis", normalize_url(url), str(fast_mode))
+        return self._submit("analysis", url, key, lambda job: self._run_analysis(job, fast_mode))
+
+    def submit_revision(self, url: str, analysis: Dict[str, Any]) -> str:
+        """Queue a revision of url based on analysis and return its job ID."""
+        digest = hashlib.sha256(json.dumps(analysis, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+        key = ("revision", normalize_url(url), digest)
+        return self._submit("revision", url, key, lambda job: self._run_revision(job, analysis))
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Return a snapshot of a job, or None when it is unknown or expired."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return replace(job) if job else None
+
+    def jobs(self) -> List[Job]:
+        """Return snapshots of all retained jobs, newest first."""
+        with self._lock:
+            return sorted((replace(job) for job in self._jobs.values()), key=lambda job: job.created_at, reverse=True)
+
+    def wait(self, job_id: str, timeout: Optional[float] = None, poll_interval: float = 0.2) -> Optional[Job]:
+        """Block until a job finishes or timeout elapses, then return its snapshot."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            job = self.get(job_id)
+            if job is None or job.finished or (deadline is not None and time.monotonic() >= deadline):
+                return job
+            time.sleep(poll_interval)
+
+    def shutdown(self, wait: bool = True):
+        """Stop accepting jobs and optionally wait for running ones."""
+        self._executor.shutdown(wait=wait)
+
+    def _submit(self, kind: str, url: str, key: Tuple[str, ...], work: Callable[[Job], Any]) -> str:
+        """Register a job (or join an identical active one) and hand it to the pool."""
+        with self._lock:
+            self._prune()
+            active_id = self._active.get(key)
+            if active_id is not None:
+                self._jobs[active_id].submitters += 1
+                return active_id
+            job = Job(id=uuid.uuid4().hex, kind=kind, url=url)
+            self._jobs[job.id] = job
+            self._active[key] = job.id
+        self._executor.submit(self._run, job, key, work)
+        return job.id
+
+    def _run(self, job: Job, key: Tuple[str, ...], work: Callable[[Job], Any]):
+        """Execute a job and record its outcome."""
+        self._update(job, status=RUNNING, started_at=time.time())
+        try:
+            outcome = {"status": DONE, "stage": "Done", "result": work(job)}
+        except Exception as e:
+            print(f"Job {job.id} ({job.kind} {job.url}) failed: {e}")
+            outcome = {"status": FAILED, "stage": "Failed", "error": str(e)}
+        with self._lock:
+            for name, value in outcome.items():
+                setattr(job, name, value)
+            job.finished_at = time.time()
+            if self._active.get(key) == job.id:
+                del self._active[key]
+
+    def _run_analysis(self, job: Job, fast_mode: Optional[bool]) -> Dict[str, Any]:
+        """Fetch, prepare and analyze a page, reporting each stage."""
+        self._update(job, stage="Fetching page")
+        content = self.analyzer.prepare_content(self.analyzer.get_page(job.url).content, job.url)
+        self._update(job, stage="Analyzing content")
+        return self.analyzer.analyze_content(
+            content, job.url, fast_mode=fast_mode,
+            on_category=lambda category, data: self._update(job, categories={**job.categories, category: data}),
+        )
+
+    def _run_revision(self, job: Job, analysis: Dict[str, Any]) -> str:
+        """Stream a revision, exposing the text generated so far as partial output."""
+        self._update(job, stage="Fetching page")
+        content = self.analyzer.prepare_content(self.analyzer.get_page(job.url).content, job.url)
+        self._update(job, stage="Generating revised content")
+        chunks = []
+        for chunk in self.analyzer.stream_revision(content, analysis):
+            chunks.append(chunk)
+            self._update(job, partial="".join(chunks))
+        return "".join(chunks)
+
+    def _update(self, job: Job, **changes):
+        """Apply changes to a job under the lock."""
+        with self._lock:
+            for name, value in changes.items():
+                setattr(job, name, value)
+
+    def _prune(self):
+        """Forget expired finished jobs, oldest first, so the registry stays bounded."""
+        now = time.time()
+        finished = sorted((job for job in self._jobs.values() if job.finished), key=lambda job: job.finished_at or 0)
+        excess = len(self._jobs) - self.max_jobs
+        for job in finished:
+            if now - (job.finished_at or now) > self.retention_seconds or excess > 0:
+                del self._jobs[job.id]
+                excess -= 1
+
+_shared_managers: Dict[str, JobManager] = {}
+_shared_managers_lock = threading.Lock()
+
+def get_job_manager(api_key: str, max_workers: int = 4) -> JobManager:
+    """Return the process-wide job manager (and its shared analyzer) for an API key."""
+    with _shared_managers_lock:
+        manager = _shared_managers.get(api_key)
+        if manager is None:
+            manager = JobManager(DocumentationAnalyzer(api_key), max_workers=max_workers)
+            _shared_managers[api_key] = manager
+        return manager
@@ -0,0 +1,380 @@
+"""
+Shared pacing, adaptive concurrency, retries and request coalescing for LLM calls.
+"""
+
+import os
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+import google.api_core.exceptions
+from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.exceptions import OutputParserException
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatGenerationChunk, ChatResult
+from langchain_google_genai import ChatGoogleGenerativeAI
+from langchain_google_genai.chat_models import ChatGoogleGenerativeAIError, _response_to_result
+from src.budget import estimate_tokens
+from src.telemetry import Tracer, get_tracer
+
+DEFAULT_REQUESTS_PER_MINUTE = 1000
+DEFAULT_TOKENS_PER_MINUTE = 1_000_000
+TRANSIENT_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+def _status_code(error: BaseException) -> Optional[int]:
+    """HTTP status of an API error, from google.api_core's .code or an HTTP response."""
+    for value in (getattr(error, 'code', None), getattr(getattr(error, 'response', None), 'status_code', None)):
+        if isinstance(value, int):
+            return value
+    return None
+
+def is_rate_limited(error: BaseException) -> bool:
+    """Whether an error means the quota was exceeded (HTTP 429 / RESOURCE_EXHAUSTED)."""
+    return _status_code(error) == 429
+
+def is_transient(error: BaseException) -> bool:
+    """Whether an error is worth retrying: rate limits, 5xx responses, timeouts and dropped connections.
+
+    Classified by type and status code only; messages can quote model output.
+    """
+    if isinstance(error, OutputParserException):
+        return False
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    return _status_code(error) in TRANSIENT_STATUS_CODES
+
+class GeminiChatModel(ChatGoogleGenerativeAI):
+    """ChatGoogleGenerativeAI without the library's own retry loop.
+
+    The pinned langchain-google-genai retries every Google API error up to 10 times with
+    waits of up to a minute before raising, so a 429 would only reach LLMClient after the
+    limit and deadline had stopped mattering. Errors surface on the first attempt instead.
+    """
+
+    def _send(self, messages: List[BaseMessage], stop: Optional[List[str]], stream: bool, **kwargs: Any) -> Any:
+        """Send the chat request once, translating invalid arguments the way the library does."""
+        params, chat, message = self._prepare_chat(messages, stop=stop, **kwargs)
+        try:
+            return chat.send_message(content=message, stream=stream, **params)
+        except google.api_core.exceptions.InvalidArgument as e:
+            raise ChatGoogleGenerativeAIError(f"Invalid argument provided to Gemini: {e}") from e
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+        return _response_to_result(self._send(messages, stop, False, **kwargs))
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        for chunk in self._send(messages, stop, True, **kwargs):
+            generation = _response_to_result(chunk, stream=True).generations[0]
+            if run_manager:
+                run_manager.on_llm_new_token(generation.text)
+            yield generation
+
+class TokenBucket:
+    """Refills at per_minute / 60 units per second, holding at most burst_seconds worth."""
+
+    def __init__(self, per_minute: float, burst_seconds: float = 10.0):
+        """Start full."""
+        self.rate = per_minute / 60
+        self.capacity = max(self.rate * burst_seconds, 1.0)
+        self._level = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        """Add what accrued since the last update."""
+        self._level = min(self.capacity, self._level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, amount: float, deadline: float) -> float:
+        """Take amount (capped at capacity), sleeping until it is available; returns seconds waited.
+
+        Raises TimeoutError when the wait would run past deadline (a time.monotonic() value).
+        """
+        amount = min(amount, self.capacity)
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._level >= amount:
+                    self._level -= amount
+                    return waited
+                delay = (amount - self._level) / self.rate
+            if now + delay > deadline:
+                raise TimeoutError("Waiting for LLM quota would exceed the request deadline")
+            time.sleep(delay)
+            waited += delay
+
+    def charge(self, amount: float):
+        """Deduct usage only known after a call, such as output tokens; the level may go negative."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._level -= amount
+
+class AdaptiveConcurrency:
+    """AIMD limit on in-flight requests.
+
+    The limit grows by one for every limit successful requests and halves on a rate-limit
+    error. Only requests started after the last decrease can decrease it again, so a burst
+    of 429s from the same window halves it once.
+    """
+
+    def __init__(self, initial: int = 4, minimum: int = 1, maximum: int = 16):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.in_flight = 0
+        self._decreased_at = 0.0
+        self._condition = threading.Condition()
+
+    def acquire(self, deadline: float):
+        """Wait for a free slot; raises TimeoutError past deadline."""
+        with self._condition:
+            while self.in_flight >= int(self.limit):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError("Timed out waiting for a free LLM request slot")
+                self._condition.wait(remaining)
+            self.in_flight += 1
+
+    def release(self, started_at: float, succeeded: bool = True, rate_limited: bool = False):
+        """Free a slot and adjust the limit from the request's outcome."""
+        with self._condition:
+            self.in_flight -= 1
+            if rate_limited:
+                if started_at >= self._decreased_at:
+                    self.limit = max(float(self.minimum), self.limit / 2)
+                    self._decreased_at = time.monotonic()
+            elif succeeded:
+                self.limit = min(float(self.maximum), self.limit + 1 / self.limit)
+            self._condition.notify_all()
+
+class _Flight:
+    """An in-flight request whose outcome, or stream of chunks, is shared with identical callers."""
+
+    def __init__(self):
+        self.chunks: List[Any] = []
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.done = False
+        self._condition = threading.Condition()
+
+    def publish(self, chunk: Any):
+        """Append a streamed chunk for followers."""
+        with self._condition:
+            self.chunks.append(chunk)
+            self._condition.notify_all()
+
+    def finish(self, result: Any = None, error: Optional[BaseException] = None):
+        """Record the outcome and wake every follower."""
+        with self._condition:
+            self.result, self.error, self.done = result, error, True
+            self._condition.notify_all()
+
+    def wait(self) -> Any:
+        """Block until the leader finishes and return (or raise) its outcome.
+
+        There is no timeout here: the leader is bounded by its own deadline and always finishes
+        the flight, so a follower never gives up on a request that is still making progress.
+        """
+        with self._condition:
+            while not self.done:
+                self._condition.wait()
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+    def replay(self, idle_seconds: float) -> Iterator[Any]:
+        """Yield the leader's chunks so far, then new ones as they arrive.
+
+        Raises TimeoutError only when no chunk arrives for idle_seconds, however long the stream runs.
+        """
+        index = 0
+        while True:
+            with self._condition:
+                deadline = time.monotonic() + idle_seconds
+                while index >= len(self.chunks) and not self.done:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise TimeoutError("Timed out waiting for an identical in-flight LLM request")
+                    self._condition.wait(remaining)
+                new, done, error = self.chunks[index:], self.done, self.error
+            index += len(new)
+            yield from new
+            if done and index >= len(self.chunks):
+                if error is not None:
+                    raise error
+                return
+
+class LLMClient:
+    """Paces, limits, retries and coalesces LLM requests for every analyzer that shares it.
+
+    Requests wait for a concurrency slot and for request and token quota, are retried with
+    jittered exponential backoff on transient errors until their deadline, and identical
+    requests already in flight are joined instead of being sent again.
+    """
+
+    def __init__(self, requests_per_minute: float = DEFAULT_REQUESTS_PER_MINUTE,
+                 tokens_per_minute: float = DEFAULT_TOKENS_PER_MINUTE, initial_concurrency: int = 4,
+                 max_concurrency: int = 16, max_retries: int = 4, base_delay: float = 1.0,
+                 max_delay: float = 30.0, deadline_seconds: float = 180.0):
+        """Quotas are per minute; deadline_seconds bounds queueing, attempts and backoff together."""
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.concurrency = AdaptiveConcurrency(initial_concurrency, 1, max_concurrency)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline_seconds = deadline_seconds
+        self._lock = threading.Lock()
+        self._flights: Dict[Tuple[str, str], _Flight] = {}
+
+    def call(self, key: str, prompt_tokens: int, fn: Callable[[], Any],
+             tracer: Optional[Tracer] = None) -> Tuple[Any, bool]:
+        """Run fn under the limits with retries.
+
+        Returns (result, shared); shared is True when an identical in-flight call with the
+        same key was joined instead of sending another request.
+        """
+        tracer = tracer or get_tracer()
+        flight, leader = self._join(("call", key))
+        if not leader:
+            tracer.incr("llm.coalesced")
+            return flight.wait(), True
+        deadline = time.monotonic() + self.deadline_seconds
+
+        try:
+            result = self._call_with_retries(prompt_tokens, fn, deadline, tracer)
+            flight.finish(result=result)
+        except BaseException as e:
+            flight.finish(error=e)
+            raise
+        finally:
+            self._leave(("call", key), flight)
+        self.tokens.charge(estimate_tokens(str(getattr(result, 'content', result))))
+        return result, False
+
+    def stream(self, key: str, prompt_tokens: int, open_stream: Callable[[], Iterator[Any]],
+               tracer: Optional[Tracer] = None) -> Tuple[Iterator[Any], bool]:
+        """Stream under the limits, retrying only until the first chunk arrives.
+
+        Returns (chunks, shared); a caller joining an identical in-flight stream receives
+        the chunks produced so far and then the rest as they arrive, timing out only when
+        the stream stalls for deadline_seconds.
+        """
+        tracer = tracer or get_tracer()
+        flight, leader = self._join(("stream", key))
+        if not leader:
+            tracer.incr("llm.coalesced")
+            return flight.replay(self.deadline_seconds), True
+        deadline = time.monotonic() + self.deadline_seconds
+        return self._lead_stream(("stream", key), flight, prompt_tokens, open_stream, deadline, tracer), False
+
+    def _join(self, key: Tuple[str, str]) -> Tuple[_Flight, bool]:
+        """Return the in-flight request for key, starting one (as leader) if there is none."""
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                return flight, False
+            flight = self._flights[key] = _Flight()
+            return flight, True
+
+    def _leave(self, key: Tuple[str, str], flight: _Flight):
+        """Stop offering a finished request to new callers."""
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+
+    def _admit(self, prompt_tokens: int, deadline: float, tracer: Tracer) -> float:
+        """Wait for a concurrency slot and request and token quota; returns when the request may start."""
+        started = time.monotonic()
+        self.concurrency.acquire(deadline)
+        try:
+            self.requests.acquire(1, deadline)
+            self.tokens.acquire(prompt_tokens, deadline)
+        except BaseException:
+            self.concurrency.release(started, succeeded=False)
+            raise
+        admitted = time.monotonic()
+        if admitted - started > 0.001:
+            tracer.observe("llm.throttle", admitted - started)
+        return admitted
+
+    def _backoff(self, error: Exception, attempt: int, deadline: float, tracer: Tracer):
+        """Sleep before retrying a transient error, or re-raise when out of retries or time."""
+        if not is_transient(error) or attempt >= self.max_retries:
+            raise error
+        if is_rate_limited(error):
+            tracer.incr("llm.rate_limited")
+        # Full jitter spreads out retries from requests that failed together
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        if time.monotonic() + delay >= deadline:
+            raise error
+        tracer.incr("llm.retries")
+        print(f"Transient LLM error, retrying in {delay:.1f}s (attempt {attempt + 2} of {self.max_retries + 1}): {error}")
+        time.sleep(delay)
+
+    def _call_with_retries(self, prompt_tokens: int, fn: Callable[[], Any], deadline: float, tracer: Tracer) -> Any:
+        """Run fn until it succeeds, fails permanently, or runs out of retries or time."""
+        attempt = 0
+        while True:
+            started = self._admit(prompt_tokens, deadline, tracer)
+            try:
+                result = fn()
+            except Exception as e:
+                self.concurrency.release(started, succeeded=False, rate_limited=is_rate_limited(e))
+                self._backoff(e, attempt, deadline, tracer)
+                attempt += 1
+                continue
+            self.concurrency.release(started)
+            return result
+
+    def _lead_stream(self, key: Tuple[str, str], flight: _Flight, prompt_tokens: int,
+                     open_stream: Callable[[], Iterator[Any]], deadline: float, tracer: Tracer) -> Iterator[Any]:
+        """Stream as the leader, holding a slot for the whole stream and publishing chunks to followers."""
+        attempt = 0
+        try:
+            while True:
+                started = self._admit(prompt_tokens, deadline, tracer)
+                received, outcome = False, {"succeeded": False}
+                try:
+                    for chunk in open_stream():
+                        received = True
+                        flight.publish(chunk)
+                        yield chunk
+                    outcome = {"succeeded": True}
+                except Exception as e:
+                    outcome = {"succeeded": False, "rate_limited": is_rate_limited(e)}
+                    if received:
+                        raise
+                    self.concurrency.release(started, **outcome)
+                    self._backoff(e, attempt, deadline, tracer)
+                    attempt += 1
+                    continue
+                finally:
+                    if received or outcome["succeeded"]:
+                        self.concurrency.release(started, **outcome)
+                break
+            flight.finish()
+        except BaseException as e:
+            flight.finish(error=e if isinstance(e, Exception) else Exception("The shared LLM stream was abandoned"))
+            raise
+        finally:
+            self._leave(key, flight)
+        self.tokens.charge(estimate_tokens("".join(str(chunk) for chunk in flight.chunks)))
+
+_shared_client: Optional[LLMClient] = None
+_shared_client_lock = threading.Lock()
+
+def get_llm_client() -> LLMClient:
+    """Return the process-wide LLM client; DOCUMETRICS_LLM_RPM and DOCUMETRICS_LLM_TPM set its quotas."""
+    global _shared_client
+    with _shared_client_lock:
+        if _shared_client is None:
+            _shared_client = LLMClient(
+                requests_per_minute=float(os.getenv('DOCUMETRICS_LLM_RPM') or DEFAULT_REQUESTS_PER_MINUTE),
+                tokens_per_minute=float(os.getenv('DOCUMETRICS_LLM_TPM') or DEFAULT_TOKENS_PER_MINUTE),
+            )
+        return _shared_client
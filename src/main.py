@@ -4,53 +4,352 @@ LangChain-Powered Documentation Improvement Agent
 Analyzes documentation and suggests improvements using LangChain.
 """
 
+import argparse
+import json
 import os
 import sys
+import time
 from dotenv import load_dotenv
 from .analyzer import DocumentationAnalyzer
-from .utils import print_results, save_results
+from .batch import BatchRunner, load_sitemap, load_url_file
+from .budget import TokenBudget
+from .llm_client import DEFAULT_REQUESTS_PER_MINUTE, DEFAULT_TOKENS_PER_MINUTE, LLMClient
+from .models import CATEGORIES, SCORE_VALUES
+from .store import TREND_BUCKETS, get_results_store
+from .telemetry import get_tracer
+from .utils import print_category_progress, print_results, save_results
+from .workqueue import WorkQueue, run_worker, run_workers
+
+def parse_args(argv=None) -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Analyze documentation pages with LangChain + Gemini.")
+    parser.add_argument("url", nargs="?", help="Documentation URL to analyze")
+    parser.add_argument("--analysis-mode", choices=["auto", "single", "parallel", "chunked", "incremental"],
+                        default="auto",
+                        help="How pages are sent to the LLM; 'parallel' sends one request per category, "
+                             "'incremental' only re-analyzes changed sections")
+    parser.add_argument("--category-model", action="append", default=[], type=category_model, metavar="CATEGORY=MODEL",
+                        help="Gemini model for one category in parallel mode, e.g. readability=gemini-2.0-flash-lite")
+    parser.add_argument("--revision-mode", choices=["auto", "single", "sections"], default="auto",
+                        help="How revisions are generated; 'sections' rewrites sections in parallel "
+                             "(default 'auto' does so for long pages)")
+    parser.add_argument("--fast", action="store_true",
+                        help="Skip the LLM for pages whose local readability/structure metrics pass thresholds")
+    parser.add_argument("--max-input-tokens", type=int, default=30000,
+                        help="Token budget per LLM request; longer inputs are compacted (default: 30000)")
+    parser.add_argument("--chunk-size", type=int,
+                        help="Pages longer than this many characters are analyzed in chunks and revised by section "
+                             "(default: three quarters of --max-input-tokens)")
+    parser.add_argument("--max-concurrency", type=int, default=4,
+                        help="Chunks or sections of one page sent to the LLM at once (default: 4)")
+    parser.add_argument("--requests-per-minute", type=float,
+                        default=float(os.getenv("DOCUMETRICS_LLM_RPM") or DEFAULT_REQUESTS_PER_MINUTE),
+                        help=f"Gemini request quota to pace calls to (default: DOCUMETRICS_LLM_RPM or {DEFAULT_REQUESTS_PER_MINUTE})")
+    parser.add_argument("--tokens-per-minute", type=float,
+                        default=float(os.getenv("DOCUMETRICS_LLM_TPM") or DEFAULT_TOKENS_PER_MINUTE),
+                        help=f"Gemini token quota to pace calls to (default: DOCUMETRICS_LLM_TPM or {DEFAULT_TOKENS_PER_MINUTE})")
+    parser.add_argument("--usage-report", metavar="PATH", help="Write per-call token usage and latency as JSON")
+    parser.add_argument("--profile", action="store_true",
+                        help="Print a per-stage timing breakdown (browser launch, page load, extraction, LLM, parse)")
+    parser.add_argument("--metrics-json", metavar="PATH", help="Write stage timings and counters as a JSON run summary")
+    parser.add_argument("--prometheus-textfile", metavar="PATH",
+                        help="Write stage timings and counters in Prometheus textfile format")
+
+    batch = parser.add_argument_group("batch mode")
+    sources = batch.add_mutually_exclusive_group()
+    sources.add_argument("--urls-file", help="File with one URL per line")
+    sources.add_argument("--sitemap", help="URL of a sitemap.xml (sitemap indexes are followed)")
+    sources.add_argument("--crawl", metavar="SEED_URL", help="Crawl same-site links starting from this URL")
+    batch.add_argument("--max-pages", type=int, help="Stop admitting new URLs after this many")
+    batch.add_argument("--fetch-concurrency", type=int, default=4, help="Pages fetched in parallel (default: 4)")
+    batch.add_argument("--llm-concurrency", type=int, default=4, help="LLM requests in flight (default: 4)")
+    batch.add_argument("--revise", action="store_true", help="Also generate revised content for every page")
+    batch.add_argument("--state", help="Progress file used to resume (default: output/batch_state.jsonl)")
+    batch.add_argument("--resume", action="store_true", help="Skip URLs completed by a previous run")
+    batch.add_argument("--keep-boilerplate", action="store_true",
+                       help="Do not strip blocks repeated across pages (navigation, footers, TOCs)")
+    return parser.parse_args(argv)
+
+def category_model(value: str) -> tuple:
+    """Parse a CATEGORY=MODEL argument."""
+    category, _, model = value.partition("=")
+    if category not in CATEGORIES or not model:
+        raise argparse.ArgumentTypeError(f"expected CATEGORY=MODEL with CATEGORY one of {', '.join(CATEGORIES)}")
+    return category, model
+
+def build_analyzer(api_key: str, args: argparse.Namespace) -> DocumentationAnalyzer:
+    """Create an analyzer configured from the command line."""
+    return DocumentationAnalyzer(
+        api_key,
+        analysis_mode=args.analysis_mode,
+        fast_mode=args.fast,
+        token_budget=TokenBudget(max_input_tokens=args.max_input_tokens),
+        chunk_size=args.chunk_size,
+        max_concurrency=args.max_concurrency,
+        category_models=dict(args.category_model),
+        revision_mode=args.revision_mode,
+        llm_client=LLMClient(requests_per_minute=args.requests_per_minute, tokens_per_minute=args.tokens_per_minute),
+    )
+
+def report_usage(analyzer: DocumentationAnalyzer, args: argparse.Namespace):
+    """Print the LLM usage summary and optionally save the full report."""
+    summary = analyzer.usage.summary()
+    print(f"\nLLM calls: {summary['calls']} ({summary['cached_calls']} cached, {summary['compacted_calls']} compacted)")
+    print(f"Tokens: ~{summary['input_tokens']} in / ~{summary['output_tokens']} out  "
+          f"Avg latency: {summary['avg_latency_seconds']}s  "
+          f"Rate: {summary['requests_per_minute']} req/min, {summary['tokens_per_minute']} tokens/min")
+    if args.usage_report:
+        analyzer.usage.save(args.usage_report)
+        print(f"Usage report written to {args.usage_report}")
+
+def report_profile(args: argparse.Namespace):
+    """Print and export the per-stage timings recorded during the run."""
+    tracer = get_tracer()
+    if args.profile:
+        print("\n" + "="*60)
+        print("PROFILE")
+        print("="*60)
+        print(tracer.format_table())
+    if args.metrics_json:
+        tracer.save_json(args.metrics_json)
+        print(f"Run summary written to {args.metrics_json}")
+    if args.prometheus_textfile:
+        tracer.write_prometheus(args.prometheus_textfile)
+        print(f"Prometheus metrics written to {args.prometheus_textfile}")
+
+def run_batch(analyzer: DocumentationAnalyzer, args: argparse.Namespace):
+    """Analyze a URL list, sitemap or crawl and report throughput."""
+    if args.urls_file:
+        urls = load_url_file(args.urls_file)
+    elif args.sitemap:
+        urls = load_sitemap(args.sitemap)
+    else:
+        urls = [args.crawl]
+    print(f"Starting batch analysis of {len(urls)} seed URL(s)...\n")
+
+    runner = BatchRunner(
+        analyzer,
+        fetch_concurrency=args.fetch_concurrency,
+        llm_concurrency=args.llm_concurrency,
+        revise=args.revise,
+        crawl=bool(args.crawl),
+        max_pages=args.max_pages,
+        state_path=args.state,
+        resume=args.resume,
+        strip_boilerplate=not args.keep_boilerplate,
+    )
+    stats = runner.run(urls)
+
+    print("\n" + "="*60)
+    print("BATCH ANALYSIS COMPLETED")
+    print("="*60)
+    print(f"Analyzed: {stats['analyzed']} ({stats['partial']} partial)  Failed: {stats['failed']}  "
+          f"Skipped (resumed): {stats['skipped']}")
+    print(f"Elapsed: {stats['elapsed_seconds']}s  Throughput: {stats['pages_per_minute']} pages/min")
+    print(f"Fetch tiers: {dict(analyzer.fetch_stats)}")
+    print(f"Estimated prompt tokens saved by deduplication: {stats['tokens_saved_by_dedup']}")
+
+RESULTS_COMMANDS = ("history", "trends", "query", "show", "import-output")
+
+def parse_results_args(argv) -> argparse.Namespace:
+    """Parse the results store subcommands."""
+    parser = argparse.ArgumentParser(prog="python -m src.main", description="Query stored analysis results.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    history = commands.add_parser("history", help="List past analyses of a URL, newest first")
+    history.add_argument("url")
+    history.add_argument("--limit", type=int, default=20)
+
+    trends = commands.add_parser("trends", help="Average scores per day, week or month")
+    trends.add_argument("--url", help="Limit to one URL (default: every stored page)")
+    trends.add_argument("--bucket", choices=list(TREND_BUCKETS), default="day")
+
+    query = commands.add_parser("query", help="Find pages by category or overall score")
+    query.add_argument("--category", choices=CATEGORIES)
+    query.add_argument("--score", choices=list(SCORE_VALUES))
+    query.add_argument("--overall", choices=list(SCORE_VALUES))
+    query.add_argument("--url-prefix", help="Only URLs starting with this prefix")
+    query.add_argument("--days", type=float, help="Only analyses from the last N days")
+    query.add_argument("--all-runs", action="store_true", help="Match every run, not just each URL's latest")
+    query.add_argument("--limit", type=int, default=100)
+    query.add_argument("--json", action="store_true", help="Print full results as JSON")
+
+    show = commands.add_parser("show", help="Print a stored analysis")
+    show.add_argument("id", type=int)
+    show.add_argument("--revision", action="store_true", help="Print only the stored revised content")
+
+    importer = commands.add_parser("import-output", help="Import analysis_*.json and revised_content_* files")
+    importer.add_argument("directory", nargs="?", default=os.path.join(os.path.dirname(__file__), '..', 'output'))
+
+    args = parser.parse_args(argv)
+    if args.command == "query" and (args.category is None) != (args.score is None):
+        parser.error("--category and --score must be used together")
+    return args
+
+def _print_rows(rows):
+    """Print stored analyses as a table."""
+    print(f"{'id':>6}  {'created':<19}  {'overall':<9}  " + "  ".join(f"{c[:11]:<11}" for c in CATEGORIES) + "  url")
+    for row in rows:
+        scores = "  ".join(f"{(row.scores[c] or '-'):<11}" for c in CATEGORIES)
+        print(f"{row.id:>6}  {row.created:<19}  {row.overall_score:<9}  {scores}  {row.url}")
+
+def run_results_command(argv):
+    """Run a results store subcommand."""
+    args = parse_results_args(argv)
+    store = get_results_store()
+
+    if args.command == "history":
+        _print_rows(store.history(args.url, args.limit))
+    elif args.command == "trends":
+        print(f"{'period':<12}{'runs':>6}{'urls':>6}{'overall':>9}" + "".join(f"{c[:11]:>13}" for c in CATEGORIES))
+        for row in store.trends(args.url, args.bucket):
+            values = "".join(f"{'-' if row[c] is None else row[c]:>13}" for c in CATEGORIES)
+            print(f"{row['period']:<12}{row['analyses']:>6}{row['urls']:>6}{'-' if row['overall'] is None else row['overall']:>9}{values}")
+    elif args.command == "query":
+        rows = store.find(category=args.category, score=args.score, overall=args.overall, url_prefix=args.url_prefix,
+                          since=time.time() - args.days * 86400 if args.days else None,
+                          latest_only=not args.all_runs, limit=args.limit)
+        if args.json:
+            print(json.dumps([{"id": row.id, "url": row.url, "created_at": row.created_at,
+                               "overall_score": row.overall_score, "analysis": row.analysis} for row in rows], indent=2))
+        else:
+            _print_rows(rows)
+            print(f"\n{len(rows)} result(s)")
+    elif args.command == "show":
+        stored = store.get(args.id)
+        if stored is None:
+            print(f"No stored analysis with id {args.id}")
+            sys.exit(1)
+        revision = store.revision(args.id)
+        if args.revision:
+            print(revision or "")
+        else:
+            print_results(stored.url, stored.analysis, revision)
+    elif args.command == "import-output":
+        stats = store.import_output_dir(args.directory)
+        print(f"Imported {stats['imported']} analyses ({stats['revisions']} with revisions), "
+              f"skipped {stats['skipped']} already imported, {stats['failed']} failed")
+
+QUEUE_COMMANDS = ("enqueue", "worker", "queue-status")
+
+def parse_queue_args(argv) -> argparse.Namespace:
+    """Parse the work queue subcommands."""
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--queue", help="Queue database (default: output/work_queue.db or DOCUMETRICS_QUEUE_DB)")
+    common.add_argument("--max-attempts", type=int, default=3, help="Attempts before a URL is marked dead (default: 3)")
+
+    parser = argparse.ArgumentParser(prog="python -m src.main", description="Distribute an audit across worker processes.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    enqueue = commands.add_parser("enqueue", parents=[common], help="Add URLs to the queue")
+    enqueue.add_argument("urls", nargs="*", help="URLs to enqueue")
+    enqueue.add_argument("--urls-file", help="File with one URL per line")
+    enqueue.add_argument("--sitemap", help="URL of a sitemap.xml (sitemap indexes are followed)")
+    enqueue.add_argument("--revise", action="store_true", help="Also generate revised content")
+    enqueue.add_argument("--requeue", action="store_true", help="Re-run URLs that are already done or dead")
+
+    worker = commands.add_parser("worker", parents=[common], help="Process queued URLs")
+    worker.add_argument("--processes", type=int, default=1, help="Worker processes to start (default: 1)")
+    worker.add_argument("--lease-seconds", type=float, default=300, help="Lease length, renewed by heartbeats (default: 300)")
+    worker.add_argument("--poll-interval", type=float, default=5.0, help="Seconds between polls of an empty queue")
+    worker.add_argument("--exit-when-empty", action="store_true", help="Exit once no URLs are pending or leased")
+
+    status = commands.add_parser("queue-status", parents=[common], help="Show queue counts and recent throughput")
+    status.add_argument("--dead", action="store_true", help="List URLs that exhausted their attempts")
+    return parser.parse_args(argv)
+
+def run_queue_command(argv):
+    """Run a work queue subcommand."""
+    args = parse_queue_args(argv)
+
+    if args.command == "enqueue":
+        urls = list(args.urls)
+        if args.urls_file:
+            urls += load_url_file(args.urls_file)
+        if args.sitemap:
+            urls += load_sitemap(args.sitemap)
+        added = WorkQueue(args.queue, max_attempts=args.max_attempts).enqueue(urls, revise=args.revise, requeue=args.requeue)
+        print(f"Enqueued {added} of {len(urls)} URL(s)")
+    elif args.command == "queue-status":
+        queue = WorkQueue(args.queue, max_attempts=args.max_attempts)
+        stats = queue.stats()
+        print(f"Pending: {stats['pending']}  Leased: {stats['leased']}  Done: {stats['done']}  Dead: {stats['dead']}")
+        print(f"Completed in the last 5 minutes: {stats['per_minute']} URLs/min")
+        if args.dead:
+            for entry in queue.dead():
+                print(f"  {entry['url']} ({entry['attempts']} attempts): {entry['error']}")
+    elif args.command == "worker":
+        load_dotenv()
+        api_key = os.getenv('GEMINI_API_KEY')
+        if not api_key:
+            print("Error: Google Gemini API key not found! Set GEMINI_API_KEY environment variable.")
+            sys.exit(1)
+        options = {"queue_path": args.queue, "lease_seconds": args.lease_seconds, "poll_interval": args.poll_interval,
+                   "exit_when_empty": args.exit_when_empty, "max_attempts": args.max_attempts}
+        if args.processes == 1:
+            run_worker(api_key, **options)
+        else:
+            run_workers(api_key, args.processes, **options)
 
 def main():
     """Main function to run the documentation analyzer."""
     try:
+        if len(sys.argv) > 1 and sys.argv[1] in RESULTS_COMMANDS:
+            run_results_command(sys.argv[1:])
+            return
+        if len(sys.argv) > 1 and sys.argv[1] in QUEUE_COMMANDS:
+            run_queue_command(sys.argv[1:])
+            return
+
+        args = parse_args()
+
         # Load environment variables
         load_dotenv()
-        
+
         # Check API key
         api_key = os.getenv('GEMINI_API_KEY')
         if not api_key:
             print("Error: Google Gemini API key not found! Set GEMINI_API_KEY environment variable.")
             sys.exit(1)
-        
+
+        if args.urls_file or args.sitemap or args.crawl:
+            analyzer = build_analyzer(api_key, args)
+            run_batch(analyzer, args)
+            report_usage(analyzer, args)
+            report_profile(args)
+            return
+
         # Get URL from command line or user input
-        if len(sys.argv) < 2:
+        url = args.url
+        if not url:
             url = input("Enter the documentation URL to analyze: ").strip()
             if not url:
                 print("No URL provided. Exiting.")
                 sys.exit(1)
-        else:
-            url = sys.argv[1]
-        
+
         # Validate URL
         if not url.startswith(('http://', 'https://')):
             print("Please provide a valid URL starting with http:// or https://")
             sys.exit(1)
-        
+
         print("Starting LangChain-powered documentation analysis...")
         print("This may take a few minutes...\n")
-        
+
         # Initialize and run analyzer
-        analyzer = DocumentationAnalyzer(api_key)
-        analysis, revised_content = analyzer.analyze_documentation(url)
-        
-        # Display and save results
-        print_results(url, analysis, revised_content)
-        save_results(url, analysis, revised_content)
-        
+        analyzer = build_analyzer(api_key, args)
+        analysis = analyzer.analyze_documentation(url, on_category=print_category_progress)
+
+        # Display results, streaming the revision as it is generated, then save
+        revised_content = print_results(url, analysis, analyzer.generate_revision_stream(url, analysis))
+        analysis_id = save_results(url, analysis, revised_content)
+        print(f"\nResults stored with id {analysis_id} (python -m src.main show {analysis_id})")
+        report_usage(analyzer, args)
+        report_profile(args)
+
         print("\n" + "="*60)
         print("ANALYSIS COMPLETED SUCCESSFULLY!")
         print("="*60)
-        
+
     except KeyboardInterrupt:
         print("\nAnalysis interrupted by user.")
         sys.exit(0)
@@ -59,4 +358,4 @@ def main():
         sys.exit(1)
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
\ No newline at end of file
@@ -0,0 +1,173 @@
+"""
+Deterministic readability and structure metrics computed locally with NumPy.
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, List
+import numpy as np
+from src.models import NOT_ASSESSED
+from src.sections import HEADING_PATTERN
+
+WORD_PATTERN = re.compile(r"[A-Za-z]+(?:'[A-Za-z]+)?")
+SENTENCE_END_PATTERN = re.compile(r"[.!?]+(?=\s|$)|\n")
+PASSIVE_PATTERN = re.compile(
+    r"\b(?:am|is|are|was|were|be|been|being)\s+(?:\w+ly\s+)?(?:\w+ed|\w+en|made|done|set|put|sent|built|kept|shown|known)\b",
+    re.IGNORECASE,
+)
+VOWELS = np.frombuffer(b"aeiouy", dtype=np.uint8)
+
+@dataclass
+class MetricThresholds:
+    """Limits a page must meet to skip LLM analysis in fast mode."""
+    min_flesch_reading_ease: float = 50.0
+    max_avg_sentence_words: float = 22.0
+    max_long_sentence_ratio: float = 0.15
+    max_passive_voice_ratio: float = 0.15
+    max_heading_skips: int = 0
+    max_repeated_paragraphs: int = 0
+    min_words: int = 150
+
+def _split_blocks(content: str) -> Dict[str, List]:
+    """Separate heading levels, prose lines and code from scraped content."""
+    levels, prose, code_lines = [], [], 0
+    in_code = False
+    for line in content.split('\n'):
+        if line.startswith('```'):
+            in_code = not in_code
+            continue
+        if in_code:
+            code_lines += 1
+            continue
+        match = HEADING_PATTERN.match(line)
+        if match:
+            levels.append(len(match.group(1)))
+        elif line.strip():
+            prose.append(line[2:] if line.startswith('- ') else line)
+    return {"levels": levels, "prose": prose, "code_lines": code_lines}
+
+def _syllable_counts(words: List[str]) -> np.ndarray:
+    """Estimate syllables per word by counting vowel groups over one flat character array."""
+    lengths = np.fromiter((len(word) for word in words), dtype=np.int64, count=len(words))
+    chars = np.frombuffer(" ".join(words).lower().encode('ascii', 'replace'), dtype=np.uint8)
+    is_vowel = np.isin(chars, VOWELS)
+    group_starts = is_vowel & ~np.concatenate(([False], is_vowel[:-1]))
+
+    offsets = np.concatenate(([0], np.cumsum(lengths + 1)[:-1]))
+    counts = np.add.reduceat(group_starts.astype(np.int64), offsets)
+
+    # A trailing silent 'e' ("make", "page") does not add a syllable
+    last_chars = chars[offsets + lengths - 1]
+    counts -= (last_chars == ord('e')) & (counts > 1) & (lengths > 2)
+    return np.maximum(counts, 1)
+
+def compute_metrics(content: str) -> Dict[str, Any]:
+    """Compute readability and structure metrics for scraped content."""
+    blocks = _split_blocks(content)
+    prose = "\n".join(blocks["prose"])
+
+    word_matches = list(WORD_PATTERN.finditer(prose))
+    words = [match.group(0) for match in word_matches]
+    word_count = len(words)
+
+    sentence_ends = np.fromiter((match.end() for match in SENTENCE_END_PATTERN.finditer(prose)), dtype=np.int64)
+    word_starts = np.fromiter((match.start() for match in word_matches), dtype=np.int64, count=word_count)
+    sentence_lengths = np.bincount(np.searchsorted(sentence_ends, word_starts, side='right'))
+    sentence_lengths = sentence_lengths[sentence_lengths > 0]
+    sentence_count = max(len(sentence_lengths), 1)
+
+    if word_count:
+        word_lengths = np.fromiter((len(word) for word in words), dtype=np.int64, count=word_count)
+        syllables = _syllable_counts(words)
+        words_per_sentence = word_count / sentence_count
+        syllables_per_word = float(syllables.mean())
+        avg_word_length = float(word_lengths.mean())
+        complex_word_ratio = float((syllables >= 3).mean())
+    else:
+        words_per_sentence = syllables_per_word = avg_word_length = complex_word_ratio = 0.0
+
+    passive = sum(1 for sentence in re.split(r"[.!?\n]+", prose) if PASSIVE_PATTERN.search(sentence))
+
+    levels = np.array(blocks["levels"], dtype=np.int64)
+    heading_skips = int((np.diff(levels) > 1).sum()) if len(levels) > 1 else 0
+
+    normalized = [" ".join(line.lower().split()) for line in blocks["prose"] if len(line.split()) >= 5]
+    if normalized:
+        _, counts = np.unique(np.array(normalized), return_counts=True)
+        repeated_paragraphs = int((counts - 1).sum())
+    else:
+        repeated_paragraphs = 0
+
+    return {
+        "readability": {
+            "word_count": word_count,
+            "sentence_count": int(len(sentence_lengths)),
+            "avg_sentence_words": round(words_per_sentence, 2),
+            "max_sentence_words": int(sentence_lengths.max()) if len(sentence_lengths) else 0,
+            "long_sentence_ratio": round(float((sentence_lengths > 25).mean()), 3) if len(sentence_lengths) else 0.0,
+            "avg_word_length": round(avg_word_length, 2),
+            "syllables_per_word": round(syllables_per_word, 2),
+            "complex_word_ratio": round(complex_word_ratio, 3),
+            "flesch_reading_ease": round(206.835 - 1.015 * words_per_sentence - 84.6 * syllables_per_word, 1) if word_count else 0.0,
+            "flesch_kincaid_grade": round(0.39 * words_per_sentence + 11.8 * syllables_per_word - 15.59, 1) if word_count else 0.0,
+            "passive_voice_ratio": round(passive / sentence_count, 3),
+        },
+        "structure": {
+            "heading_count": int(len(levels)),
+            "heading_levels": [int(level) for level in np.bincount(levels, minlength=7)[1:]] if len(levels) else [0] * 6,
+            "heading_skips": heading_skips,
+            "starts_with_h1": bool(len(levels) and levels[0] == 1),
+            "paragraph_count": len(blocks["prose"]),
+            "repeated_paragraphs": repeated_paragraphs,
+            "code_lines": blocks["code_lines"],
+        },
+    }
+
+def passes_thresholds(metrics: Dict[str, Any], thresholds: MetricThresholds) -> bool:
+    """Check whether a page is good enough to skip LLM analysis."""
+    readability, structure = metrics["readability"], metrics["structure"]
+    return (readability["word_count"] >= thresholds.min_words
+            and readability["flesch_reading_ease"] >= thresholds.min_flesch_reading_ease
+            and readability["avg_sentence_words"] <= thresholds.max_avg_sentence_words
+            and readability["long_sentence_ratio"] <= thresholds.max_long_sentence_ratio
+            and readability["passive_voice_ratio"] <= thresholds.max_passive_voice_ratio
+            and structure["heading_skips"] <= thresholds.max_heading_skips
+            and structure["repeated_paragraphs"] <= thresholds.max_repeated_paragraphs)
+
+def local_analysis(metrics: Dict[str, Any]) -> Dict[str, Any]:
+    """Build a DocumentationAnalysis-shaped result from local metrics alone.
+
+    Completeness and style cannot be judged locally, so they are marked NOT_ASSESSED and
+    left out of the overall score.
+    """
+    readability, structure = metrics["readability"], metrics["structure"]
+    ease = readability["flesch_reading_ease"]
+
+    structure_issues = []
+    if structure["heading_count"] == 0:
+        structure_issues.append("The page has no headings.")
+    if not structure["starts_with_h1"] and structure["heading_count"]:
+        structure_issues.append("The page does not start with a top-level heading.")
+
+    return {
+        "readability": {
+            "score": "Excellent" if ease >= 65 else "Good",
+            "issues": [],
+            "suggestions": [f"Flesch reading ease {ease}, grade level {readability['flesch_kincaid_grade']}."],
+        },
+        "structure": {
+            "score": "Good" if structure_issues else "Excellent",
+            "issues": structure_issues,
+            "suggestions": [],
+        },
+        "completeness": {
+            "score": NOT_ASSESSED,
+            "issues": [],
+            "suggestions": ["Not assessed by the LLM (fast mode); run a full analysis to check coverage."],
+        },
+        "style_guidelines": {
+            "score": NOT_ASSESSED,
+            "issues": [],
+            "suggestions": ["Not assessed by the LLM (fast mode); run a full analysis to check style."],
+        },
+    }
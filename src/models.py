@@ -2,8 +2,42 @@
 Pydantic models for documentation analysis.
 """
 
-from typing import List
-from pydantic import BaseModel, Field
+from typing import Any, Dict, List
+from pydantic import BaseModel, Field, create_model
+
+CATEGORIES = ['readability', 'structure', 'completeness', 'style_guidelines']
+SCORE_VALUES = {'Excellent': 4, 'Good': 3, 'Fair': 2, 'Poor': 1}
+# Score of categories that were not assessed (e.g. skipped in fast mode); never averaged or indexed
+NOT_ASSESSED = 'Not assessed'
+
+def score_from_value(value: float) -> str:
+    """Map an average score value back onto the Excellent/Good/Fair/Poor scale."""
+    if value >= 3.5:
+        return "Excellent"
+    elif value >= 2.5:
+        return "Good"
+    elif value >= 1.5:
+        return "Fair"
+    else:
+        return "Poor"
+
+def scored_categories(analysis: Dict[str, Any]) -> List[str]:
+    """Categories whose score comes from a real assessment.
+
+    Categories listed under "failed_categories" hold a failure placeholder and are left out,
+    as are unassessed ones, whose score is NOT_ASSESSED rather than one of SCORE_VALUES.
+    """
+    failed = set(analysis.get('failed_categories', []))
+    return [category for category in CATEGORIES
+            if category in analysis and category not in failed
+            and analysis[category].get('score', 'Fair') in SCORE_VALUES]
+
+def overall_score(analysis: Dict[str, Any]) -> str:
+    """Average the assessed category scores of an analysis; "Unknown" when none are scored."""
+    scores = [SCORE_VALUES[analysis[category].get('score', 'Fair')] for category in scored_categories(analysis)]
+    if not scores:
+        return "Unknown"
+    return score_from_value(sum(scores) / len(scores))
 
 class CategoryAnalysis(BaseModel):
     """Analysis for a specific documentation category."""
@@ -16,4 +50,41 @@ class DocumentationAnalysis(BaseModel):
     readability: CategoryAnalysis = Field(description="Readability analysis")
     structure: CategoryAnalysis = Field(description="Structure analysis")
     completeness: CategoryAnalysis = Field(description="Completeness analysis")
-    style_guidelines: CategoryAnalysis = Field(description="Style guidelines analysis") 
\ No newline at end of file
+    style_guidelines: CategoryAnalysis = Field(description="Style guidelines analysis")
+
+class ReadabilityAnalysis(CategoryAnalysis):
+    """Readability analysis returned by the per-category prompt."""
+    issues: List[str] = Field(description="Readability issues such as long sentences, undefined jargon or passive voice")
+    suggestions: List[str] = Field(description="Concrete rewrites or changes that make the text easier to read")
+
+class StructureAnalysis(CategoryAnalysis):
+    """Structure analysis returned by the per-category prompt."""
+    issues: List[str] = Field(description="Structure issues such as skipped heading levels, poor ordering or walls of text")
+    suggestions: List[str] = Field(description="Concrete changes to headings, ordering, lists or navigation")
+
+class CompletenessAnalysis(CategoryAnalysis):
+    """Completeness analysis returned by the per-category prompt."""
+    issues: List[str] = Field(description="Missing information such as prerequisites, steps, examples or error handling")
+    suggestions: List[str] = Field(description="Content that should be added, and where")
+
+class StyleGuidelinesAnalysis(CategoryAnalysis):
+    """Style guidelines analysis returned by the per-category prompt."""
+    issues: List[str] = Field(description="Deviations from documentation style guidelines such as tone, terminology or formatting")
+    suggestions: List[str] = Field(description="Concrete edits that bring the text in line with the style guidelines")
+
+CATEGORY_MODELS = {
+    'readability': ReadabilityAnalysis,
+    'structure': StructureAnalysis,
+    'completeness': CompletenessAnalysis,
+    'style_guidelines': StyleGuidelinesAnalysis,
+}
+
+def analysis_model(categories: List[str]) -> type:
+    """Return a DocumentationAnalysis-style model restricted to the given categories."""
+    if list(categories) == CATEGORIES:
+        return DocumentationAnalysis
+    fields = {
+        category: (CategoryAnalysis, Field(description=f"{category.replace('_', ' ').capitalize()} analysis"))
+        for category in categories
+    }
+    return create_model("PartialDocumentationAnalysis", **fields)
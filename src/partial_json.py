@@ -0,0 +1,184 @@
+"""
+Incremental parsing and local repair of streamed JSON analysis output.
+"""
+
+import json
+import re
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from pydantic import ValidationError
+from src.models import CATEGORIES, CategoryAnalysis
+
+TRAILING_COMMA_PATTERN = re.compile(r',\s*([}\]])')
+# A brace that can open a JSON object, unlike the braces in prose such as "{the}"
+OBJECT_START_PATTERN = re.compile(r'\{\s*(?:"|\}|$)')
+FENCE_PATTERN = re.compile(r'```[a-zA-Z]*\s*\{')
+MAX_REPAIR_CUTS = 50
+MAX_REPAIR_STARTS = 10
+
+def _close(text: str) -> str:
+    """Terminate an open string and close every open object and array."""
+    stack, in_string, escaped = [], False, False
+    for char in text:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == '\\':
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in '{[':
+            stack.append('}' if char == '{' else ']')
+        elif char in '}]' and stack:
+            stack.pop()
+    if in_string:
+        text += '\\"' if escaped else '"'
+    text = text.rstrip()
+    # A dangling "key": or trailing comma cannot be closed as-is
+    text = re.sub(r'(,|:)\s*$', lambda match: '' if match.group(1) == ',' else ': null', text)
+    return text + "".join(reversed(stack))
+
+def _cut_points(text: str) -> List[int]:
+    """Positions of commas outside strings, where a trailing partial member can be dropped."""
+    points, in_string, escaped = [], False, False
+    for index, char in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == '\\':
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char == ',':
+            points.append(index)
+    return points
+
+def _object_starts(text: str) -> List[int]:
+    """Where a JSON object may begin: the first fenced block, then each plausible opening brace."""
+    starts = []
+    fence = FENCE_PATTERN.search(text)
+    if fence:
+        starts.append(fence.end() - 1)
+    for match in OBJECT_START_PATTERN.finditer(text):
+        if match.start() not in starts:
+            starts.append(match.start())
+    return starts[:MAX_REPAIR_STARTS]
+
+def repair_json(text: str, allow_truncated: bool = True) -> Optional[Dict[str, Any]]:
+    """Parse a JSON object out of model output that may be fenced, truncated or slightly malformed.
+
+    Starting from the first fenced block, or else the first brace that can open an object,
+    tries in order: the complete object (ignoring surrounding prose or code fences), the
+    same with trailing commas removed, and finally (with allow_truncated) the truncated
+    text closed off after dropping incomplete trailing members one at a time. Later
+    starting points are tried when nothing parses. Returns None when nothing does.
+    """
+    for start in _object_starts(text):
+        value = _repair_from(text[start:], allow_truncated)
+        if value is not None:
+            return value
+    return None
+
+def _repair_from(text: str, allow_truncated: bool) -> Optional[Dict[str, Any]]:
+    """Parse the object that text starts with; see repair_json."""
+    decoder = json.JSONDecoder()
+    for candidate in (text, TRAILING_COMMA_PATTERN.sub(r'\1', text)):
+        try:
+            value, _ = decoder.raw_decode(candidate)
+            if isinstance(value, dict):
+                return value
+        except json.JSONDecodeError:
+            pass
+    if not allow_truncated:
+        return None
+
+    cuts = _cut_points(text)
+    for _ in range(MAX_REPAIR_CUTS):
+        try:
+            value = json.loads(TRAILING_COMMA_PATTERN.sub(r'\1', _close(text)))
+            if isinstance(value, dict):
+                return value
+        except json.JSONDecodeError:
+            pass
+        if not cuts:
+            return None
+        text = text[:cuts.pop()]
+    return None
+
+def valid_categories(data: Optional[Dict[str, Any]], categories: Iterable[str] = CATEGORIES) -> Dict[str, Dict[str, Any]]:
+    """Return the categories of a parsed object that validate as CategoryAnalysis."""
+    valid = {}
+    for category in categories:
+        value = (data or {}).get(category)
+        if not isinstance(value, dict):
+            continue
+        try:
+            valid[category] = CategoryAnalysis(**value).dict()
+        except ValidationError:
+            continue
+    return valid
+
+class CategoryStreamParser:
+    """Feeds streamed analysis text and reports each category as soon as its object is complete."""
+
+    def __init__(self, categories: Iterable[str] = CATEGORIES):
+        """Only the given categories are reported."""
+        self.categories = list(categories)
+        self.completed: Dict[str, Dict[str, Any]] = {}
+        self._buffer: List[str] = []
+        self._length = 0
+        self._closed_at = 0
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+
+    @property
+    def text(self) -> str:
+        """Everything received so far."""
+        return "".join(self._buffer)
+
+    def feed(self, chunk: str) -> List[Tuple[str, Dict[str, Any]]]:
+        """Add a chunk; returns categories that became complete within it."""
+        self._buffer.append(chunk)
+        member_closed = False
+        for offset, char in enumerate(chunk):
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == '\\':
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in '{[':
+                self._depth += 1
+            elif char in '}]':
+                self._depth -= 1
+                if self._depth <= 1:
+                    # A value of the top-level object just closed
+                    member_closed = True
+                    self._closed_at = self._length + offset + 1
+        self._length += len(chunk)
+        return self._collect(valid_categories(repair_json(self.text[:self._closed_at]), self.categories)) \
+            if member_closed else []
+
+    def finish(self) -> List[Tuple[str, Dict[str, Any]]]:
+        """Salvage categories from the whole output once the stream ends.
+
+        Categories whose objects were closed are always kept. Beyond that, the whole text
+        is accepted only if it parses after light repair (fences, prose, trailing commas);
+        a category cut off mid-object is left out so it can be requested again.
+        """
+        found = valid_categories(repair_json(self.text[:self._closed_at]), self.categories)
+        found.update(valid_categories(repair_json(self.text, allow_truncated=False), self.categories))
+        return self._collect(found)
+
+    def _collect(self, found: Dict[str, Dict[str, Any]]) -> List[Tuple[str, Dict[str, Any]]]:
+        """Record and return categories not reported before."""
+        new = [(category, data) for category, data in found.items() if category not in self.completed]
+        self.completed.update(new)
+        return new
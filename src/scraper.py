@@ -0,0 +1,327 @@
+"""
+Page fetching and content extraction helpers.
+"""
+
+import re
+import time
+import urllib.error
+import urllib.request
+from urllib.parse import urldefrag, urljoin
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+from bs4 import BeautifulSoup, Comment, NavigableString, Tag
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.support.ui import WebDriverWait
+from src.browser import USER_AGENT
+
+MAIN_SELECTORS = [
+    "main", ".main-content", "#main-content",
+    ".article-content", ".content", ".post-content",
+    ".entry-content", "[role='main']"
+]
+BOILERPLATE_TAGS = {"script", "style", "noscript", "template", "svg", "nav", "iframe", "button", "form"}
+PAGE_CHROME_TAGS = {"header", "footer", "aside"}
+PARAGRAPH_TAGS = {"p", "blockquote", "dt", "dd", "figcaption", "caption", "summary"}
+BLOCK_TAGS = {
+    "div", "section", "article", "main", "body", "ul", "ol", "dl", "table", "thead",
+    "tbody", "tfoot", "details", "figure", "header", "footer", "aside", "center",
+}
+# Other elements (custom elements, card links, framework roots) are walked when they contain any of these
+STRUCTURAL_TAGS = {"h1", "h2", "h3", "h4", "h5", "h6", "pre", "li", "tr"} | PARAGRAPH_TAGS | BLOCK_TAGS
+
+# Pages whose static HTML yields less text than this are treated as JS-rendered
+MIN_CONTENT_CHARS = 200
+
+# Statuses that mean the page does not exist, so Chrome is not tried; 401, 403 and 429 are
+# often bot protection against plain HTTP clients and still fall back to the browser
+MISSING_PAGE_STATUS_CODES = {400, 404, 410}
+
+@dataclass
+class ScrapeResult:
+    """Extracted page content and the fetch tier that produced it."""
+    url: str
+    content: str
+    tier: str
+    content_hash: Optional[str] = None
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    fetched_at: Optional[float] = None
+    links: List[str] = field(default_factory=list)
+
+def _http_request(url: str, extra_headers: Optional[Dict[str, str]] = None) -> urllib.request.Request:
+    """Build a request carrying the scraper's browser-like headers."""
+    headers = {
+        'User-Agent': USER_AGENT,
+        'Accept': 'text/html,application/xhtml+xml',
+    }
+    headers.update(extra_headers or {})
+    return urllib.request.Request(url, headers=headers)
+
+def _read_html(response) -> Tuple[str, Dict[str, Optional[str]]]:
+    """Decode an HTML response body, along with its ETag/Last-Modified validators."""
+    content_type = response.headers.get('Content-Type', '')
+    if 'html' not in content_type:
+        raise Exception(f"Unexpected content type: {content_type or 'unknown'}")
+    charset = response.headers.get_content_charset() or 'utf-8'
+    validators = {
+        'etag': response.headers.get('ETag'),
+        'last_modified': response.headers.get('Last-Modified'),
+    }
+    return response.read().decode(charset, errors='replace'), validators
+
+def fetch_html(url: str, timeout: float = 10.0) -> Tuple[str, Dict[str, Optional[str]]]:
+    """Fetch raw HTML over plain HTTP, along with its ETag/Last-Modified validators."""
+    with urllib.request.urlopen(_http_request(url), timeout=timeout) as response:
+        return _read_html(response)
+
+def fetch_if_modified(url: str, etag: Optional[str], last_modified: Optional[str],
+                      timeout: float = 10.0) -> Optional[Tuple[str, Dict[str, Optional[str]]]]:
+    """Send a conditional GET; None when the server answered 304 Not Modified.
+
+    Otherwise returns the new HTML and validators like fetch_html, so a changed page is
+    downloaded only once. Errors are raised as they are.
+    """
+    headers = {}
+    if etag:
+        headers['If-None-Match'] = etag
+    if last_modified:
+        headers['If-Modified-Since'] = last_modified
+    try:
+        with urllib.request.urlopen(_http_request(url, headers), timeout=timeout) as response:
+            if response.status == 304:
+                return None
+            return _read_html(response)
+    except urllib.error.HTTPError as e:
+        if e.code == 304:
+            return None
+        raise
+
+def has_real_content(content: str) -> bool:
+    """Check whether extracted content is substantial enough to analyze."""
+    return len(content.strip()) >= MIN_CONTENT_CHARS
+
+# Walks the DOM once in the browser and returns an ordered outline in which
+# every leaf's text appears exactly once. Mirrors _walk_soup below.
+OUTLINE_SCRIPT = """
+var selectors = arguments[0];
+var root = null;
+for (var i = 0; i < selectors.length && !root; i++) {
+    var candidate = document.querySelector(selectors[i]);
+    if (candidate && candidate.innerText && candidate.innerText.trim()) { root = candidate; }
+}
+var skipChrome = !root;
+root = root || document.body;
+var SKIP = {SCRIPT:1, STYLE:1, NOSCRIPT:1, TEMPLATE:1, SVG:1, NAV:1, IFRAME:1, BUTTON:1, FORM:1};
+var CHROME = {HEADER:1, FOOTER:1, ASIDE:1};
+var PARAGRAPH = {P:1, BLOCKQUOTE:1, DT:1, DD:1, FIGCAPTION:1, CAPTION:1, SUMMARY:1};
+var BLOCK = {DIV:1, SECTION:1, ARTICLE:1, MAIN:1, BODY:1, UL:1, OL:1, DL:1, TABLE:1, THEAD:1,
+             TBODY:1, TFOOT:1, DETAILS:1, FIGURE:1, HEADER:1, FOOTER:1, ASIDE:1, CENTER:1};
+var STRUCTURE = 'h1,h2,h3,h4,h5,h6,pre,li,tr,p,blockquote,dt,dd,figcaption,caption,summary,' +
+                'div,section,article,main,ul,ol,dl,table,details,figure,header,footer,aside,center';
+var blocks = [];
+var buffer = [];
+var inListItem = false;
+function clean(text) { return (text || '').replace(/\\s+/g, ' ').trim(); }
+function flush() {
+    var text = clean(buffer.join(' '));
+    buffer = [];
+    if (text) { blocks.push({type: inListItem ? 'list_item' : 'paragraph', text: text}); }
+}
+function hidden(el) {
+    return el.hidden || el.getAttribute('aria-hidden') === 'true' ||
+           (el.offsetParent === null && el.getClientRects().length === 0);
+}
+function walk(node) {
+    for (var child = node.firstChild; child; child = child.nextSibling) {
+        if (child.nodeType === 3) { buffer.push(child.nodeValue); continue; }
+        if (child.nodeType !== 1) { continue; }
+        var tag = child.tagName.toUpperCase();
+        if (SKIP[tag] || (skipChrome && CHROME[tag]) || hidden(child)) { continue; }
+        if (/^H[1-6]$/.test(tag)) {
+            flush();
+            var heading = clean(child.innerText);
+            if (heading) { blocks.push({type: 'heading', level: parseInt(tag[1], 10), text: heading}); }
+        } else if (tag === 'PRE') {
+            flush();
+            var code = (child.innerText || '').replace(/\\s+$/, '');
+            if (code.trim()) { blocks.push({type: 'code', text: code}); }
+        } else if (tag === 'LI') {
+            flush();
+            var outer = inListItem;
+            inListItem = true;
+            walk(child);
+            flush();
+            inListItem = outer;
+        } else if (tag === 'TR') {
+            flush();
+            var cells = [];
+            for (var c = 0; c < child.cells.length; c++) {
+                var cell = clean(child.cells[c].innerText);
+                if (cell) { cells.push(cell); }
+            }
+            if (cells.length) { blocks.push({type: 'paragraph', text: cells.join(' | ')}); }
+        } else if (PARAGRAPH[tag]) {
+            flush();
+            buffer.push(child.innerText);
+            flush();
+        } else if (BLOCK[tag] || child.querySelector(STRUCTURE)) {
+            flush();
+            walk(child);
+            flush();
+        } else {
+            buffer.push(child.innerText || child.textContent || '');
+        }
+    }
+}
+walk(root);
+flush();
+return blocks;
+"""
+
+def render_outline(blocks: List[Dict[str, Any]]) -> str:
+    """Render outline blocks as markdown-style text with '#' heading markers."""
+    lines = []
+    for block in blocks:
+        block_type = block.get('type')
+        text = block.get('text', '')
+        if block_type == 'heading':
+            lines.append(f"{'#' * int(block.get('level', 1))} {text}")
+        elif block_type == 'list_item':
+            lines.append(f"- {text}")
+        elif block_type == 'code':
+            lines.append(f"```\n{text}\n```")
+        elif len(text) > 3:
+            lines.append(text)
+    return "\n".join(lines)
+
+def _clean(text: str) -> str:
+    """Collapse runs of whitespace."""
+    return re.sub(r'\s+', ' ', text).strip()
+
+def _is_hidden(element: Tag) -> bool:
+    """Detect elements hidden through markup, since static HTML has no layout."""
+    style = (element.get('style') or '').replace(' ', '').lower()
+    return (element.has_attr('hidden') or element.get('aria-hidden') == 'true'
+            or 'display:none' in style)
+
+class _OutlineBuilder:
+    """Builds an outline from a BeautifulSoup tree; mirrors OUTLINE_SCRIPT."""
+
+    def __init__(self, skip_chrome: bool):
+        self.skip_chrome = skip_chrome
+        self.blocks: List[Dict[str, Any]] = []
+        self.buffer: List[str] = []
+        self.in_list_item = False
+
+    def flush(self):
+        """Emit buffered inline text as a single block."""
+        text = _clean(' '.join(self.buffer))
+        self.buffer = []
+        if text:
+            self.blocks.append({'type': 'list_item' if self.in_list_item else 'paragraph', 'text': text})
+
+    def walk(self, node: Tag):
+        """Append the outline of a subtree, emitting each leaf's text once."""
+        for child in node.children:
+            if isinstance(child, NavigableString):
+                if not isinstance(child, Comment):
+                    self.buffer.append(str(child))
+                continue
+            if not isinstance(child, Tag):
+                continue
+
+            tag = child.name.lower()
+            if tag in BOILERPLATE_TAGS or (self.skip_chrome and tag in PAGE_CHROME_TAGS) or _is_hidden(child):
+                continue
+            if re.fullmatch(r'h[1-6]', tag):
+                self.flush()
+                heading = _clean(child.get_text(' '))
+                if heading:
+                    self.blocks.append({'type': 'heading', 'level': int(tag[1]), 'text': heading})
+            elif tag == 'pre':
+                self.flush()
+                code = child.get_text().rstrip()
+                if code.strip():
+                    self.blocks.append({'type': 'code', 'text': code})
+            elif tag == 'li':
+                self.flush()
+                outer, self.in_list_item = self.in_list_item, True
+                self.walk(child)
+                self.flush()
+                self.in_list_item = outer
+            elif tag == 'tr':
+                self.flush()
+                cells = [_clean(cell.get_text(' ')) for cell in child.find_all(['td', 'th'], recursive=False)]
+                cells = [cell for cell in cells if cell]
+                if cells:
+                    self.blocks.append({'type': 'paragraph', 'text': ' | '.join(cells)})
+            elif tag in PARAGRAPH_TAGS:
+                self.flush()
+                self.buffer.append(child.get_text(' '))
+                self.flush()
+            elif tag in BLOCK_TAGS or child.find(STRUCTURAL_TAGS) is not None:
+                self.flush()
+                self.walk(child)
+                self.flush()
+            else:
+                self.buffer.append(child.get_text(' '))
+
+def extract_from_html(html: str) -> str:
+    """Extract an outline from static HTML using the same selectors as the browser path."""
+    soup = BeautifulSoup(html, 'html.parser')
+
+    root = None
+    for selector in MAIN_SELECTORS:
+        candidate = soup.select_one(selector)
+        if candidate and candidate.get_text(strip=True):
+            root = candidate
+            break
+
+    builder = _OutlineBuilder(skip_chrome=root is None)
+    builder.walk(root or soup.body or soup)
+    builder.flush()
+    return render_outline(builder.blocks)
+
+def wait_for_content(driver, timeout: float = 15.0, poll_interval: float = 0.5, stable_polls: int = 2):
+    """Wait for DOM readiness, then until the rendered text stops changing."""
+    deadline = time.monotonic() + timeout
+    try:
+        WebDriverWait(driver, timeout).until(
+            lambda d: d.execute_script("return document.readyState") == "complete"
+        )
+    except TimeoutException:
+        print("Page did not reach readyState 'complete'; extracting what has rendered")
+        return
+
+    last_length = -1
+    stable = 0
+    while time.monotonic() < deadline:
+        length = driver.execute_script("return document.body ? document.body.innerText.length : 0;")
+        if length and length == last_length:
+            stable += 1
+            if stable >= stable_polls:
+                return
+        else:
+            stable = 0
+        last_length = length
+        time.sleep(poll_interval)
+
+def extract_links_from_html(html: str, base_url: str) -> List[str]:
+    """Return the absolute, fragment-free link targets on a page."""
+    soup = BeautifulSoup(html, 'html.parser')
+    links = []
+    for anchor in soup.find_all('a', href=True):
+        link = urldefrag(urljoin(base_url, anchor['href'].strip()))[0]
+        if link.startswith(('http://', 'https://')):
+            links.append(link)
+    return links
+
+def extract_links_from_driver(driver) -> List[str]:
+    """Return the absolute, fragment-free link targets on the loaded page."""
+    links = driver.execute_script("return Array.prototype.map.call(document.links, function(a) { return a.href; });") or []
+    return [urldefrag(link)[0] for link in links if link.startswith(('http://', 'https://'))]
+
+def extract_from_driver(driver) -> str:
+    """Extract an outline from the loaded page in a single script round-trip."""
+    blocks = driver.execute_script(OUTLINE_SCRIPT, MAIN_SELECTORS) or []
+    return render_outline(blocks)
@@ -0,0 +1,184 @@
+"""
+Heading-based sectioning of scraped content and merging of per-part analyses.
+"""
+
+import hashlib
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Set, Tuple
+from src.models import CATEGORIES, SCORE_VALUES, score_from_value
+
+HEADING_PATTERN = re.compile(r'^(#{1,6}) (.+)$')
+KEYWORD_PATTERN = re.compile(r'[a-z][a-z0-9_-]{3,}')
+STOPWORDS = frozenset(
+    "about above after also been before being between both could does each from have here into more most "
+    "much only other same should some such than that their them then there these they this those through "
+    "under very were what when where which while will with within would your page section content article "
+    "documentation text consider make ensure provide using users user".split()
+)
+
+@dataclass
+class Section:
+    """A heading and the content lines that follow it."""
+    heading: str
+    level: int
+    text: str
+
+def split_sections(content: str) -> List[Section]:
+    """Split content on the '#' heading markers emitted by scrape_page."""
+    sections: List[Section] = []
+    heading, level, lines = "", 0, []
+    in_code = False
+
+    for line in content.split('\n'):
+        if line.startswith('```'):
+            in_code = not in_code
+        match = None if in_code else HEADING_PATTERN.match(line)
+        if match:
+            if any(part.strip() for part in lines):
+                sections.append(Section(heading, level, "\n".join(lines)))
+            heading, level, lines = match.group(2).strip(), len(match.group(1)), [line]
+        else:
+            lines.append(line)
+
+    if any(part.strip() for part in lines):
+        sections.append(Section(heading, level, "\n".join(lines)))
+    return sections
+
+def section_fingerprint(text: str) -> str:
+    """Fingerprint a section, ignoring whitespace-only differences."""
+    return hashlib.sha256(" ".join(text.split()).encode('utf-8')).hexdigest()
+
+def section_units(content: str, min_chars: int = 400) -> List[Section]:
+    """Split content into sections, folding very short ones into the section that follows."""
+    units: List[Section] = []
+    pending: Optional[Section] = None
+    for section in split_sections(content):
+        if pending is not None:
+            section = Section(pending.heading, pending.level, pending.text + "\n" + section.text)
+            pending = None
+        if len(section.text) < min_chars:
+            pending = section
+            continue
+        units.append(section)
+
+    if pending is not None:
+        if units:
+            last = units.pop()
+            pending = Section(last.heading, last.level, last.text + "\n" + pending.text)
+        units.append(pending)
+    return units
+
+def _split_oversized(text: str, chunk_size: int) -> List[str]:
+    """Split a single oversized section on line boundaries."""
+    pieces, current, size = [], [], 0
+    for line in text.split('\n'):
+        if current and size + len(line) + 1 > chunk_size:
+            pieces.append("\n".join(current))
+            current, size = [], 0
+        current.append(line)
+        size += len(line) + 1
+    if current:
+        pieces.append("\n".join(current))
+    return pieces
+
+def pack_chunks(sections: List[Section], chunk_size: int) -> List[str]:
+    """Greedily pack consecutive sections into chunks of at most chunk_size characters."""
+    chunks, current, size = [], [], 0
+    for section in sections:
+        pieces = _split_oversized(section.text, chunk_size) if len(section.text) > chunk_size else [section.text]
+        for piece in pieces:
+            if current and size + len(piece) + 1 > chunk_size:
+                chunks.append("\n".join(current))
+                current, size = [], 0
+            current.append(piece)
+            size += len(piece) + 1
+    if current:
+        chunks.append("\n".join(current))
+    return chunks
+
+def _dedupe(items: List[str]) -> List[str]:
+    """Drop repeated items, comparing case- and whitespace-insensitively."""
+    seen, unique = set(), []
+    for item in items:
+        key = re.sub(r'\W+', ' ', item).strip().lower()
+        if key and key not in seen:
+            seen.add(key)
+            unique.append(item)
+    return unique
+
+def merge_analyses(analyses: List[Dict[str, Any]], weights: Optional[List[float]] = None) -> Dict[str, Any]:
+    """Reduce per-part analyses into one, weighting scores and deduplicating feedback.
+
+    Categories a part lists in failed_categories are left out; a category no part produced
+    keeps the failure placeholder and is listed as failed in the merged result.
+    """
+    weights = weights or [1.0] * len(analyses)
+    merged, failed = {}, []
+    for category in CATEGORIES:
+        total, weight_sum, issues, suggestions, produced = 0.0, 0.0, [], [], False
+        for analysis, weight in zip(analyses, weights):
+            data = analysis.get(category)
+            if not isinstance(data, dict) or category in analysis.get('failed_categories', []):
+                continue
+            produced = True
+            if data.get('score') in SCORE_VALUES:
+                total += SCORE_VALUES[data['score']] * weight
+                weight_sum += weight
+            issues.extend(data.get('issues', []))
+            suggestions.extend(data.get('suggestions', []))
+
+        if not produced:
+            failed.append(category)
+            merged[category] = {"score": "Fair", "issues": ["Analysis failed"], "suggestions": ["Please try again"]}
+            continue
+        merged[category] = {
+            "score": score_from_value(total / weight_sum) if weight_sum else "Fair",
+            "issues": _dedupe(issues),
+            "suggestions": _dedupe(suggestions),
+        }
+    if failed:
+        merged["failed_categories"] = failed
+    return merged
+
+def keywords(text: str) -> Set[str]:
+    """Distinctive lowercase words of a text, used to match feedback to sections."""
+    return {word for word in KEYWORD_PATTERN.findall(text.lower()) if word not in STOPWORDS}
+
+def route_feedback(sections: List[Section], analysis: Dict[str, Any],
+                   min_overlap: int = 2) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """Assign each issue and suggestion to the sections it shares the most keywords with.
+
+    Heading words count double. Items overlapping no section by at least min_overlap are
+    page-wide. Returns one analysis per section holding only its items, plus the page-wide
+    analysis; both keep the page's category scores.
+    """
+    heading_words = [keywords(section.heading) for section in sections]
+    body_words = [keywords(section.text) for section in sections]
+
+    failed = set(analysis.get('failed_categories', []))
+
+    def empty() -> Dict[str, Any]:
+        return {category: {"score": data.get('score'), "issues": [], "suggestions": []}
+                for category, data in analysis.items()
+                if category in CATEGORIES and category not in failed and isinstance(data, dict)}
+
+    routed, general = [empty() for _ in sections], empty()
+    for category in general:
+        for field in ("issues", "suggestions"):
+            for item in analysis[category].get(field, []):
+                words = keywords(item)
+                overlaps = [2 * len(words & heading) + len(words & body)
+                            for heading, body in zip(heading_words, body_words)]
+                best = max(overlaps, default=0)
+                if best < min_overlap:
+                    general[category][field].append(item)
+                    continue
+                for index, overlap in enumerate(overlaps):
+                    if overlap == best:
+                        routed[index][category][field].append(item)
+    return routed, general
+
+def has_feedback(analysis: Dict[str, Any]) -> bool:
+    """Whether an analysis holds any issue or suggestion."""
+    return any(data.get('issues') or data.get('suggestions') for data in analysis.values())
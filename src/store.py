@@ -0,0 +1,249 @@
+"""
+Indexed SQLite store for analysis results and compressed revisions.
+"""
+
+import glob
+import json
+import os
+import re
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from src.cache import SQLiteCache, normalize_url
+from src.models import CATEGORIES, SCORE_VALUES, overall_score, scored_categories
+
+TREND_BUCKETS = {'day': '%Y-%m-%d', 'week': '%Y-W%W', 'month': '%Y-%m'}
+OUTPUT_FILE_PATTERN = re.compile(r'^analysis_(\d{8}_\d{6}(?:_\d+)?)\.json$')
+
+def default_results_path() -> str:
+    """Return the results database path, overridable with DOCUMETRICS_RESULTS_DB."""
+    return os.getenv('DOCUMETRICS_RESULTS_DB') or os.path.join(os.path.dirname(__file__), '..', 'output', 'results.db')
+
+def _score_value_sql(column: str) -> str:
+    """SQL expression mapping a score column onto its numeric value."""
+    cases = " ".join(f"WHEN '{score}' THEN {value}" for score, value in SCORE_VALUES.items())
+    return f"CASE {column} {cases} END"
+
+@dataclass
+class StoredAnalysis:
+    """One stored analysis run."""
+    id: int
+    url: str
+    created_at: float
+    overall_score: str
+    scores: Dict[str, Optional[str]]
+    analysis: Dict[str, Any]
+    has_revision: bool
+
+    @property
+    def created(self) -> str:
+        """Creation time as a readable local timestamp."""
+        return datetime.fromtimestamp(self.created_at).strftime('%Y-%m-%d %H:%M:%S')
+
+class ResultsStore(SQLiteCache):
+    """Analyses indexed by URL, time, overall and per-category score, with zlib-compressed revisions."""
+
+    def __init__(self, path: Optional[str] = None):
+        """Open (and create if needed) the results database."""
+        super().__init__(path or default_results_path())
+        score_columns = ",\n".join(f"{category}_score TEXT" for category in CATEGORIES)
+        with self._lock, self._conn:
+            self._conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS analyses (
+                    id INTEGER PRIMARY KEY,
+                    url TEXT NOT NULL,
+                    url_key TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    overall_score TEXT NOT NULL,
+                    overall_value REAL,
+                    {score_columns},
+                    analysis TEXT NOT NULL,
+                    source TEXT UNIQUE
+                )
+            """)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS revisions (
+                    analysis_id INTEGER PRIMARY KEY REFERENCES analyses(id),
+                    created_at REAL NOT NULL,
+                    size INTEGER NOT NULL,
+                    body BLOB NOT NULL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS analyses_url ON analyses(url_key, created_at)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS analyses_created ON analyses(created_at)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS analyses_overall ON analyses(overall_value)")
+            for category in CATEGORIES:
+                self._conn.execute(
+                    f"CREATE INDEX IF NOT EXISTS analyses_{category} ON analyses({category}_score, created_at)"
+                )
+
+    def save(self, url: str, analysis: Dict[str, Any], revised_content: Optional[str] = None,
+             created_at: Optional[float] = None, source: Optional[str] = None) -> int:
+        """Store an analysis (and its revision); returns the analysis id.
+
+        source identifies imported files so re-importing them is a no-op.
+        """
+        created_at = created_at or time.time()
+        overall = overall_score(analysis)
+        # Failed categories are stored without a score so they never match score queries
+        scored = scored_categories(analysis)
+        scores = [analysis[category]['score'] if category in scored else None for category in CATEGORIES]
+        columns = ", ".join(f"{category}_score" for category in CATEGORIES)
+        placeholders = ", ".join("?" for _ in CATEGORIES)
+        with self._lock, self._conn:
+            if source is not None:
+                row = self._conn.execute("SELECT id FROM analyses WHERE source = ?", (source,)).fetchone()
+                if row is not None:
+                    return row[0]
+            cursor = self._conn.execute(
+                f"INSERT INTO analyses (url, url_key, created_at, overall_score, overall_value, {columns}, analysis, source) "
+                f"VALUES (?, ?, ?, ?, ?, {placeholders}, ?, ?)",
+                (url, normalize_url(url), created_at, overall, SCORE_VALUES.get(overall), *scores,
+                 json.dumps(analysis, ensure_ascii=False), source)
+            )
+            analysis_id = cursor.lastrowid
+            if revised_content:
+                encoded = revised_content.encode('utf-8')
+                self._conn.execute(
+                    "INSERT INTO revisions (analysis_id, created_at, size, body) VALUES (?, ?, ?, ?)",
+                    (analysis_id, created_at, len(encoded), zlib.compress(encoded, 6))
+                )
+        return analysis_id
+
+    def get(self, analysis_id: int) -> Optional[StoredAnalysis]:
+        """Return one analysis by id."""
+        rows = self._select("WHERE a.id = ?", (analysis_id,))
+        return rows[0] if rows else None
+
+    def revision(self, analysis_id: int) -> Optional[str]:
+        """Return the decompressed revision stored with an analysis."""
+        with self._lock:
+            row = self._conn.execute("SELECT body FROM revisions WHERE analysis_id = ?", (analysis_id,)).fetchone()
+        return zlib.decompress(row[0]).decode('utf-8') if row else None
+
+    def latest(self, url: str) -> Optional[StoredAnalysis]:
+        """Return the most recent analysis of a URL."""
+        rows = self._select("WHERE a.url_key = ? ORDER BY a.created_at DESC LIMIT 1", (normalize_url(url),))
+        return rows[0] if rows else None
+
+    def history(self, url: str, limit: Optional[int] = None) -> List[StoredAnalysis]:
+        """Return the analyses of a URL, newest first."""
+        return self._select("WHERE a.url_key = ? ORDER BY a.created_at DESC LIMIT ?",
+                            (normalize_url(url), -1 if limit is None else limit))
+
+    def find(self, category: Optional[str] = None, score: Optional[str] = None,
+             overall: Optional[str] = None, url_prefix: Optional[str] = None,
+             since: Optional[float] = None, latest_only: bool = True, limit: int = 100) -> List[StoredAnalysis]:
+        """Find analyses by category score, overall score, URL prefix and age.
+
+        With latest_only (the default) only each URL's most recent analysis is considered,
+        so "pages rated Poor on structure" reflects the current state of every page.
+        """
+        if category is not None and category not in CATEGORIES:
+            raise ValueError(f"Unknown category: {category}")
+        if (category is None) != (score is None):
+            raise ValueError("category and score must be given together")
+
+        clauses, params = [], []
+        if category is not None:
+            clauses.append(f"a.{category}_score = ?")
+            params.append(score)
+        if overall is not None:
+            clauses.append("a.overall_score = ?")
+            params.append(overall)
+        if url_prefix is not None:
+            clauses.append("a.url LIKE ? ESCAPE '\\'")
+            params.append(url_prefix.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%')
+        if since is not None:
+            clauses.append("a.created_at >= ?")
+            params.append(since)
+        if latest_only:
+            clauses.append("a.created_at = (SELECT MAX(created_at) FROM analyses WHERE url_key = a.url_key)")
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        return self._select(f"{where} ORDER BY a.created_at DESC LIMIT ?", (*params, limit))
+
+    def trends(self, url: Optional[str] = None, bucket: str = 'day') -> List[Dict[str, Any]]:
+        """Average overall and per-category score values per day, week or month."""
+        if bucket not in TREND_BUCKETS:
+            raise ValueError(f"Unknown bucket: {bucket}")
+        averages = ", ".join(f"AVG({_score_value_sql(f'{category}_score')})" for category in CATEGORIES)
+        where, params = ("WHERE url_key = ?", (normalize_url(url),)) if url else ("", ())
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT strftime('{TREND_BUCKETS[bucket]}', created_at, 'unixepoch', 'localtime') AS period, "
+                f"COUNT(*), COUNT(DISTINCT url_key), AVG(overall_value), {averages} "
+                f"FROM analyses {where} GROUP BY period ORDER BY period",
+                params
+            ).fetchall()
+        return [{
+            "period": row[0],
+            "analyses": row[1],
+            "urls": row[2],
+            "overall": None if row[3] is None else round(row[3], 2),
+            **{category: None if value is None else round(value, 2) for category, value in zip(CATEGORIES, row[4:])},
+        } for row in rows]
+
+    def _select(self, clause: str, params: tuple) -> List[StoredAnalysis]:
+        """Run an analyses query and build StoredAnalysis rows."""
+        score_columns = ", ".join(f"a.{category}_score" for category in CATEGORIES)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT a.id, a.url, a.created_at, a.overall_score, {score_columns}, a.analysis, "
+                f"EXISTS(SELECT 1 FROM revisions r WHERE r.analysis_id = a.id) FROM analyses a {clause}",
+                params
+            ).fetchall()
+        return [StoredAnalysis(
+            id=row[0], url=row[1], created_at=row[2], overall_score=row[3],
+            scores=dict(zip(CATEGORIES, row[4:4 + len(CATEGORIES)])),
+            analysis=json.loads(row[-2]), has_revision=bool(row[-1]),
+        ) for row in rows]
+
+    def import_output_dir(self, output_dir: str) -> Dict[str, int]:
+        """Import analysis_*.json files and their matching revised_content_* files; safe to re-run."""
+        stats = {"imported": 0, "revisions": 0, "skipped": 0, "failed": 0}
+        for path in sorted(glob.glob(os.path.join(output_dir, 'analysis_*.json'))):
+            match = OUTPUT_FILE_PATTERN.match(os.path.basename(path))
+            if not match:
+                continue
+            source = os.path.abspath(path)
+            with self._lock:
+                known = self._conn.execute("SELECT 1 FROM analyses WHERE source = ?", (source,)).fetchone()
+            if known:
+                stats["skipped"] += 1
+                continue
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                created_at = datetime.fromisoformat(data["timestamp"]).timestamp() if data.get("timestamp") \
+                    else os.path.getmtime(path)
+
+                revised_content = None
+                for extension in ('txt', 'md'):
+                    revision_path = os.path.join(output_dir, f"revised_content_{match.group(1)}.{extension}")
+                    if os.path.exists(revision_path):
+                        with open(revision_path, 'r', encoding='utf-8') as f:
+                            revised_content = f.read()
+                        break
+
+                self.save(data["url"], data["analysis"], revised_content, created_at=created_at, source=source)
+                stats["imported"] += 1
+                stats["revisions"] += revised_content is not None
+            except Exception as e:
+                print(f"Could not import {path}: {e}")
+                stats["failed"] += 1
+        return stats
+
+_shared_store: Optional[ResultsStore] = None
+_shared_store_lock = threading.Lock()
+
+def get_results_store() -> ResultsStore:
+    """Return the process-wide results store."""
+    global _shared_store
+    with _shared_store_lock:
+        if _shared_store is None:
+            _shared_store = ResultsStore()
+        return _shared_store
@@ -4,6 +4,7 @@ Streamlit frontend for the Documentation Analyzer.
 
 import os
 import sys
+import time
 from pathlib import Path
 
 # Add the parent directory to Python path
@@ -12,6 +13,7 @@ sys.path.append(str(Path(__file__).parent.parent))
 import streamlit as st
 from dotenv import load_dotenv
 from src.analyzer import DocumentationAnalyzer
+from src.jobs import DONE, FAILED, get_job_manager
 import json
 from datetime import datetime
 
@@ -47,10 +49,11 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-def display_analysis_results(analysis, url):
+POLL_INTERVAL = 0.5
+
+def display_analysis_results(analyzer: DocumentationAnalyzer, analysis, url):
     """Display analysis results in a structured format."""
     # Overall score
-    analyzer = DocumentationAnalyzer(os.getenv('GEMINI_API_KEY'))
     overall_score = analyzer.calculate_overall_score(analysis)
     score_class = overall_score.lower()
     
@@ -89,6 +92,21 @@ def display_analysis_results(analysis, url):
     # Detailed analysis for each category
     st.markdown("## Task 1: Detailed Analysis")
     st.markdown("This section provides a comprehensive analysis of your documentation across multiple dimensions.")
+    display_category_tabs(analysis)
+    
+    # Locally computed metrics attached to the analysis
+    if analysis.get('metrics'):
+        with st.expander("Local Metrics"):
+            col1, col2 = st.columns(2)
+            with col1:
+                st.markdown("**Readability**")
+                st.json(analysis['metrics'].get('readability', {}))
+            with col2:
+                st.markdown("**Structure**")
+                st.json(analysis['metrics'].get('structure', {}))
+
+def display_category_tabs(analysis):
+    """Show one tab per category; categories not analyzed yet are marked as pending."""
     tabs = st.tabs(['Readability', 'Structure', 'Completeness', 'Style Guidelines'])
     
     for tab, category in zip(tabs, ['readability', 'structure', 'completeness', 'style_guidelines']):
@@ -109,6 +127,33 @@ def display_analysis_results(analysis, url):
                         st.markdown("**Suggestions:**")
                         for suggestion in data['suggestions']:
                             st.markdown(f"- {suggestion}")
+            else:
+                st.caption("Still being analyzed...")
+
+def poll_job(manager, state_key: str):
+    """Return a finished job stored under state_key, or None while it is still running.
+
+    While the job is queued or running, its stage and partial output (completed analysis
+    categories or revision text so far) are shown, and the script reruns after a short
+    pause, so the session never blocks on the work itself.
+    """
+    job = manager.get(st.session_state[state_key])
+    if job is None:
+        st.error("This job has expired. Please submit it again.")
+        del st.session_state[state_key]
+        return None
+    if job.finished:
+        del st.session_state[state_key]
+        return job
+
+    elapsed = time.time() - (job.started_at or job.created_at)
+    st.info(f"{job.stage}... ({elapsed:.0f}s)")
+    if job.categories:
+        display_category_tabs(job.categories)
+    if job.partial:
+        st.markdown(job.partial)
+    time.sleep(POLL_INTERVAL)
+    st.rerun()
 
 def main():
     """Main Streamlit application."""
@@ -124,8 +169,12 @@ def main():
         st.error("Error: Google Gemini API key not found! Set GEMINI_API_KEY environment variable.")
         return
     
+    # One analyzer, browser pool and worker pool are shared by every session in this process
+    manager = get_job_manager(api_key, max_workers=int(os.getenv('DOCUMETRICS_JOB_WORKERS', '4')))
+    
     # URL input
     url = st.text_input("Enter documentation URL:", placeholder="https://example.com/docs")
+    fast_mode = st.checkbox("Fast mode", help="Skip the LLM when local readability and structure metrics pass thresholds")
     
     # Initialize session state for storing analysis results
     if 'analysis_results' not in st.session_state:
@@ -140,52 +189,51 @@ def main():
             st.error("Please provide a valid URL starting with http:// or https://")
             return
         
-        try:
-            with st.spinner("Analyzing documentation... This may take a few minutes."):
-                # Initialize analyzer
-                analyzer = DocumentationAnalyzer(api_key)
-                
-                # Run analysis
-                analysis = analyzer.analyze_documentation(url)
-                
-                # Store analysis results in session state
-                st.session_state.analysis_results = analysis
-                st.session_state.current_url = url
-                
-                # Display results
-                display_analysis_results(analysis, url)
-                
-        except Exception as e:
-            st.error(f"Error during analysis: {str(e)}")
+        # Queue the analysis; identical in-flight requests from other sessions share one job
+        st.session_state.analysis_job = manager.submit_analysis(url, fast_mode=fast_mode)
+        st.session_state.current_url = url
+        st.session_state.analysis_results = None
+        st.session_state.revised_content = None
+    
+    if 'analysis_job' in st.session_state:
+        job = poll_job(manager, 'analysis_job')
+        if job is not None and job.status == FAILED:
+            st.error(f"Error during analysis: {job.error}")
+        elif job is not None and job.status == DONE:
+            st.session_state.analysis_results = job.result
+    
+    if st.session_state.analysis_results is not None:
+        display_analysis_results(manager.analyzer, st.session_state.analysis_results, st.session_state.current_url)
     
     # Show revision button only if we have analysis results
     if st.session_state.analysis_results is not None:
         st.markdown("## Task 2: Generate Revised Content (Bonus)")
         st.markdown("Based on the analysis, generate an improved version of your documentation.")
         if st.button("Generate Revised Content"):
-            try:
-                with st.spinner("Generating revised content... This may take a few minutes."):
-                    # Initialize analyzer
-                    analyzer = DocumentationAnalyzer(api_key)
-                    
-                    # Generate revision
-                    revised_content = analyzer.generate_revision(st.session_state.current_url, st.session_state.analysis_results)
-                    
-                    # Show revised content
-                    if revised_content:
-                        st.subheader("Revised Content")
-                        st.markdown(revised_content)
-                        
-                        # Download revised content
-                        st.download_button(
-                            label="Download Revised Content (Text)",
-                            data=revised_content,
-                            file_name=f"revised_content_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt",
-                            mime="text/plain"
-                        )
-                    
-            except Exception as e:
-                st.error(f"Error generating revised content: {str(e)}")
+            st.session_state.revision_job = manager.submit_revision(
+                st.session_state.current_url, st.session_state.analysis_results
+            )
+            st.session_state.revised_content = None
+        
+        if 'revision_job' in st.session_state:
+            job = poll_job(manager, 'revision_job')
+            if job is not None and job.status == FAILED:
+                st.error(f"Error generating revised content: {job.error}")
+            elif job is not None and job.status == DONE:
+                st.session_state.revised_content = job.result
+        
+        revised_content = st.session_state.get('revised_content')
+        if revised_content:
+            st.subheader("Revised Content")
+            st.markdown(revised_content)
+            
+            # Download revised content
+            st.download_button(
+                label="Download Revised Content (Text)",
+                data=revised_content,
+                file_name=f"revised_content_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt",
+                mime="text/plain"
+            )
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -0,0 +1,156 @@
+"""
+Per-stage timing spans and counters for the scrape and analysis pipeline.
+"""
+
+import json
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Iterator, Optional
+
+METRIC_PREFIX = "documetrics"
+
+@dataclass
+class SpanStats:
+    """Aggregated timings of one named stage."""
+    count: int = 0
+    total_seconds: float = 0.0
+    min_seconds: float = 0.0
+    max_seconds: float = 0.0
+    errors: int = 0
+
+    def add(self, seconds: float, failed: bool):
+        """Fold one timing into the aggregate."""
+        self.min_seconds = seconds if self.count == 0 else min(self.min_seconds, seconds)
+        self.max_seconds = max(self.max_seconds, seconds)
+        self.count += 1
+        self.total_seconds += seconds
+        self.errors += failed
+
+class Tracer:
+    """Thread-safe span timings and counters with JSON and Prometheus export."""
+
+    def __init__(self):
+        """Start with no recorded spans or counters."""
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+        self.spans: Dict[str, SpanStats] = {}
+        self.counters: Dict[str, int] = {}
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        """Time the enclosed block under name; exceptions are counted and re-raised."""
+        started = time.perf_counter()
+        failed = False
+        try:
+            yield
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            self.observe(name, time.perf_counter() - started, failed)
+
+    def observe(self, name: str, seconds: float, failed: bool = False):
+        """Record a timing measured elsewhere."""
+        with self._lock:
+            self.spans.setdefault(name, SpanStats()).add(seconds, failed)
+
+    def incr(self, name: str, amount: int = 1):
+        """Increase a counter."""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def reset(self):
+        """Drop everything recorded so far."""
+        with self._lock:
+            self.started_at = time.time()
+            self.spans.clear()
+            self.counters.clear()
+
+    def summary(self) -> Dict[str, Any]:
+        """Return span aggregates (slowest total first) and counters."""
+        with self._lock:
+            spans = {name: asdict(stats) for name, stats in self.spans.items()}
+            counters = dict(self.counters)
+            started_at = self.started_at
+        for stats in spans.values():
+            stats["avg_seconds"] = stats["total_seconds"] / stats["count"] if stats["count"] else 0.0
+            for key in ("total_seconds", "min_seconds", "max_seconds", "avg_seconds"):
+                stats[key] = round(stats[key], 4)
+        return {
+            "started_at": started_at,
+            "wall_seconds": round(time.time() - started_at, 3),
+            "spans": dict(sorted(spans.items(), key=lambda item: item[1]["total_seconds"], reverse=True)),
+            "counters": dict(sorted(counters.items())),
+        }
+
+    def save_json(self, path: str):
+        """Write the run summary as JSON."""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.summary(), f, indent=2)
+
+    def to_prometheus(self) -> str:
+        """Render spans and counters in the Prometheus text exposition format."""
+        summary = self.summary()
+        lines = [
+            f"# HELP {METRIC_PREFIX}_stage_seconds_total Time spent in each pipeline stage.",
+            f"# TYPE {METRIC_PREFIX}_stage_seconds_total counter",
+        ]
+        lines += [f'{METRIC_PREFIX}_stage_seconds_total{{stage="{name}"}} {stats["total_seconds"]}'
+                  for name, stats in summary["spans"].items()]
+        lines += [
+            f"# HELP {METRIC_PREFIX}_stage_calls_total Number of times each pipeline stage ran.",
+            f"# TYPE {METRIC_PREFIX}_stage_calls_total counter",
+        ]
+        lines += [f'{METRIC_PREFIX}_stage_calls_total{{stage="{name}"}} {stats["count"]}'
+                  for name, stats in summary["spans"].items()]
+        lines += [
+            f"# HELP {METRIC_PREFIX}_stage_errors_total Number of times each pipeline stage raised.",
+            f"# TYPE {METRIC_PREFIX}_stage_errors_total counter",
+        ]
+        lines += [f'{METRIC_PREFIX}_stage_errors_total{{stage="{name}"}} {stats["errors"]}'
+                  for name, stats in summary["spans"].items()]
+        lines += [
+            f"# HELP {METRIC_PREFIX}_stage_max_seconds Slowest single run of each pipeline stage.",
+            f"# TYPE {METRIC_PREFIX}_stage_max_seconds gauge",
+        ]
+        lines += [f'{METRIC_PREFIX}_stage_max_seconds{{stage="{name}"}} {stats["max_seconds"]}'
+                  for name, stats in summary["spans"].items()]
+        for name, value in summary["counters"].items():
+            metric = f"{METRIC_PREFIX}_{re.sub(r'[^a-zA-Z0-9_]', '_', name)}_total"
+            lines += [f"# TYPE {metric} counter", f"{metric} {value}"]
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str):
+        """Write a textfile for the node_exporter textfile collector, atomically."""
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(self.to_prometheus())
+        os.replace(temp_path, path)
+
+    def format_table(self) -> str:
+        """Render a per-stage breakdown for the terminal."""
+        summary = self.summary()
+        rows = [f"{'stage':<24}{'calls':>7}{'total s':>10}{'avg s':>9}{'max s':>9}{'errors':>8}"]
+        for name, stats in summary["spans"].items():
+            rows.append(f"{name:<24}{stats['count']:>7}{stats['total_seconds']:>10.3f}"
+                        f"{stats['avg_seconds']:>9.3f}{stats['max_seconds']:>9.3f}{stats['errors']:>8}")
+        if summary["counters"]:
+            rows.append("")
+            rows += [f"{name:<24}{value:>7}" for name, value in summary["counters"].items()]
+        rows.append(f"\nWall time: {summary['wall_seconds']}s")
+        return "\n".join(rows)
+
+_shared_tracer: Optional[Tracer] = None
+_shared_tracer_lock = threading.Lock()
+
+def get_tracer() -> Tracer:
+    """Return the process-wide tracer."""
+    global _shared_tracer
+    with _shared_tracer_lock:
+        if _shared_tracer is None:
+            _shared_tracer = Tracer()
+        return _shared_tracer
@@ -2,43 +2,42 @@
 Utility functions for the documentation analyzer.
 """
 
+import hashlib
 import json
 from datetime import datetime
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Iterable, List, Optional, Union
 import os
+from src.store import ResultsStore, get_results_store
+
+def _prompt_path(prompt_type: str) -> str:
+    """Return the path of a prompt template file."""
+    return os.path.join(os.path.dirname(__file__), '..', 'prompts', f'{prompt_type}.json')
 
 def load_prompt_template(prompt_type: str) -> List[tuple[str, str]]:
     """Load prompt template from JSON file."""
-    prompt_file = os.path.join(os.path.dirname(__file__), '..', 'prompts', f'{prompt_type}.json')
+    prompt_file = _prompt_path(prompt_type)
     with open(prompt_file, 'r', encoding='utf-8') as f:
         data = json.load(f)
     return [(msg['role'], msg['content']) for msg in data['messages']]
 
-def save_results(url: str, analysis: Dict[str, Any], revised_content: Optional[str] = None):
-    """Save analysis results and revised content to files."""
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    output_dir = os.path.join(os.path.dirname(__file__), '..', 'output')
-    os.makedirs(output_dir, exist_ok=True)
-    
-    # Save analysis as JSON
-    result_data = {
-        "url": url,
-        "timestamp": datetime.now().isoformat(),
-        "analysis": analysis
-    }
-    
-    json_file = os.path.join(output_dir, f"analysis_{timestamp}.json")
-    with open(json_file, 'w', encoding='utf-8') as f:
-        json.dump(result_data, f, indent=2, ensure_ascii=False)
-    
-    # Save revised content if available
-    if revised_content:
-        content_file = os.path.join(output_dir, f"revised_content_{timestamp}.txt")
-        with open(content_file, 'w', encoding='utf-8') as f:
-            f.write(revised_content)
+def prompt_fingerprint(prompt_type: str) -> str:
+    """Hash a prompt template file so cached responses can detect prompt edits."""
+    with open(_prompt_path(prompt_type), 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
 
-def print_results(url: str, analysis: Dict[str, Any], revised_content: Optional[str] = None):
-    """Print analysis results in a readable format."""
+def save_results(url: str, analysis: Dict[str, Any], revised_content: Optional[str] = None,
+                 store: Optional[ResultsStore] = None) -> int:
+    """Save analysis results and revised content to the results store; returns the analysis id."""
+    return (store or get_results_store()).save(url, analysis, revised_content)
+
+def print_category_progress(category: str, data: Dict[str, Any]):
+    """Print a one-line summary of a category as soon as its analysis is available."""
+    print(f"  {category.replace('_', ' ').capitalize()}: {data.get('score', 'N/A')} "
+          f"({len(data.get('issues', []))} issues, {len(data.get('suggestions', []))} suggestions)", flush=True)
+
+def print_results(url: str, analysis: Dict[str, Any],
+                  revised_content: Optional[Union[str, Iterable[str]]] = None) -> Optional[str]:
+    """Print analysis results in a readable format; streamed revisions are printed as they arrive."""
     print("\n" + "="*60)
     print("DOCUMENTATION ANALYSIS RESULTS")
     print("="*60)
@@ -66,8 +65,27 @@ def print_results(url: str, analysis: Dict[str, Any], revised_content: Optional[
                 for i, suggestion in enumerate(data['suggestions'], 1):
                     print(f"  {i}. {suggestion}")
     
+    metrics = analysis.get('metrics')
+    if metrics:
+        print(f"\n{'-'*30}")
+        print("LOCAL METRICS")
+        print(f"{'-'*30}")
+        for group in ('readability', 'structure'):
+            for name, value in metrics.get(group, {}).items():
+                print(f"  {name.replace('_', ' ').capitalize()}: {value}")
+
     if revised_content:
         print(f"\n{'='*60}")
         print("REVISED CONTENT")
         print("="*60)
-        print(revised_content) 
\ No newline at end of file
+        if isinstance(revised_content, str):
+            print(revised_content)
+        else:
+            chunks = []
+            for chunk in revised_content:
+                chunks.append(chunk)
+                print(chunk, end="", flush=True)
+            print()
+            revised_content = "".join(chunks)
+
+    return revised_content 
\ No newline at end of file
@@ -0,0 +1,284 @@
+"""
+Durable SQLite work queue and multi-process workers for large audits.
+"""
+
+import multiprocessing
+import os
+import socket
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional
+from src.cache import SQLiteCache, normalize_url
+
+PENDING, LEASED, DONE, DEAD = "pending", "leased", "done", "dead"
+
+def default_queue_path() -> str:
+    """Return the queue database path, overridable with DOCUMETRICS_QUEUE_DB."""
+    return os.getenv('DOCUMETRICS_QUEUE_DB') or os.path.join(os.path.dirname(__file__), '..', 'output', 'work_queue.db')
+
+@dataclass
+class Task:
+    """A URL leased to a worker."""
+    id: int
+    url: str
+    revise: bool
+    attempts: int
+
+class WorkQueue(SQLiteCache):
+    """URLs to analyze, claimed by workers under expiring leases.
+
+    A worker that dies stops heartbeating, its lease expires and the URL is handed to
+    another worker. URLs that fail (or lose their lease) max_attempts times are marked
+    dead instead of being retried forever.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_attempts: int = 3, retry_delay: float = 30.0):
+        """Open (and create if needed) the queue; failed URLs wait retry_delay * attempts before a retry."""
+        super().__init__(path or default_queue_path())
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        with self._lock, self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS tasks (
+                    id INTEGER PRIMARY KEY,
+                    url TEXT NOT NULL,
+                    url_key TEXT NOT NULL UNIQUE,
+                    revise INTEGER NOT NULL DEFAULT 0,
+                    status TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    available_at REAL NOT NULL,
+                    lease_owner TEXT,
+                    lease_expires REAL,
+                    enqueued_at REAL NOT NULL,
+                    finished_at REAL,
+                    analysis_id INTEGER,
+                    last_error TEXT
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS tasks_claim ON tasks(status, available_at)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS tasks_lease ON tasks(status, lease_expires)")
+
+    @contextmanager
+    def _write(self) -> Iterator[None]:
+        """Run statements in one write transaction that also excludes other processes."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield
+            except BaseException:
+                self._conn.rollback()
+                raise
+            self._conn.commit()
+
+    def enqueue(self, urls: Iterable[str], revise: bool = False, requeue: bool = False) -> int:
+        """Add URLs; known URLs are skipped unless requeue resets finished or dead ones."""
+        now = time.time()
+        added = 0
+        with self._write():
+            for url in urls:
+                cursor = self._conn.execute(
+                    "INSERT OR IGNORE INTO tasks (url, url_key, revise, status, available_at, enqueued_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (url, normalize_url(url), int(revise), PENDING, now, now)
+                )
+                if not cursor.rowcount and requeue:
+                    cursor = self._conn.execute(
+                        "UPDATE tasks SET status = ?, attempts = 0, available_at = ?, revise = ?, last_error = NULL "
+                        "WHERE url_key = ? AND status IN (?, ?)",
+                        (PENDING, now, int(revise), normalize_url(url), DONE, DEAD)
+                    )
+                added += cursor.rowcount
+        return added
+
+    def claim(self, worker_id: str, lease_seconds: float) -> Optional[Task]:
+        """Lease the next available URL to a worker, reclaiming expired leases first."""
+        now = time.time()
+        with self._write():
+            self._expire_leases(now)
+            row = self._conn.execute(
+                "SELECT id, url, revise, attempts FROM tasks WHERE status = ? AND available_at <= ? "
+                "ORDER BY available_at, id LIMIT 1",
+                (PENDING, now)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE tasks SET status = ?, attempts = attempts + 1, lease_owner = ?, lease_expires = ? WHERE id = ?",
+                (LEASED, worker_id, now + lease_seconds, row[0])
+            )
+        return Task(id=row[0], url=row[1], revise=bool(row[2]), attempts=row[3] + 1)
+
+    def heartbeat(self, task: Task, worker_id: str, lease_seconds: float) -> bool:
+        """Extend a lease; False when the worker no longer holds it."""
+        with self._write():
+            cursor = self._conn.execute(
+                "UPDATE tasks SET lease_expires = ? WHERE id = ? AND status = ? AND lease_owner = ?",
+                (time.time() + lease_seconds, task.id, LEASED, worker_id)
+            )
+        return cursor.rowcount == 1
+
+    def complete(self, task: Task, worker_id: str, analysis_id: int) -> bool:
+        """Mark a leased URL as done; False when the lease was lost to another worker."""
+        with self._write():
+            cursor = self._conn.execute(
+                "UPDATE tasks SET status = ?, finished_at = ?, analysis_id = ?, lease_owner = NULL, lease_expires = NULL, "
+                "last_error = NULL WHERE id = ? AND status = ? AND lease_owner = ?",
+                (DONE, time.time(), analysis_id, task.id, LEASED, worker_id)
+            )
+        return cursor.rowcount == 1
+
+    def fail(self, task: Task, worker_id: str, error: str) -> str:
+        """Record a failed attempt; returns the URL's new status (pending for a retry, or dead)."""
+        now = time.time()
+        status = DEAD if task.attempts >= self.max_attempts else PENDING
+        with self._write():
+            self._conn.execute(
+                "UPDATE tasks SET status = ?, available_at = ?, finished_at = ?, last_error = ?, lease_owner = NULL, "
+                "lease_expires = NULL WHERE id = ? AND status = ? AND lease_owner = ?",
+                (status, now + self.retry_delay * task.attempts, now if status == DEAD else None, error[:2000],
+                 task.id, LEASED, worker_id)
+            )
+        return status
+
+    def pending_work(self) -> bool:
+        """Whether any URL is still waiting or being processed."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT EXISTS(SELECT 1 FROM tasks WHERE status IN (?, ?))", (PENDING, LEASED)
+            ).fetchone()[0] == 1
+
+    def stats(self, window_seconds: float = 300) -> Dict[str, float]:
+        """Count URLs per status and the completion rate over the last window_seconds."""
+        now = time.time()
+        with self._write():
+            self._expire_leases(now)
+        with self._lock:
+            counts = dict(self._conn.execute("SELECT status, COUNT(*) FROM tasks GROUP BY status").fetchall())
+            recent = self._conn.execute(
+                "SELECT COUNT(*) FROM tasks WHERE status = ? AND finished_at >= ?", (DONE, now - window_seconds)
+            ).fetchone()[0]
+        stats = {status: counts.get(status, 0) for status in (PENDING, LEASED, DONE, DEAD)}
+        stats["per_minute"] = round(recent / window_seconds * 60, 2)
+        return stats
+
+    def dead(self, limit: int = 50) -> List[Dict[str, str]]:
+        """Return URLs that exhausted their attempts, with their last error."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT url, attempts, last_error FROM tasks WHERE status = ? ORDER BY finished_at DESC LIMIT ?",
+                (DEAD, limit)
+            ).fetchall()
+        return [{"url": row[0], "attempts": row[1], "error": row[2]} for row in rows]
+
+    def _expire_leases(self, now: float):
+        """Return URLs with expired leases to the queue, or mark them dead when out of attempts."""
+        self._conn.execute(
+            "UPDATE tasks SET status = ?, finished_at = ?, last_error = 'Lease expired', lease_owner = NULL, "
+            "lease_expires = NULL WHERE status = ? AND lease_expires < ? AND attempts >= ?",
+            (DEAD, now, LEASED, now, self.max_attempts)
+        )
+        self._conn.execute(
+            "UPDATE tasks SET status = ?, available_at = ?, last_error = 'Lease expired', lease_owner = NULL, "
+            "lease_expires = NULL WHERE status = ? AND lease_expires < ?",
+            (PENDING, now, LEASED, now)
+        )
+
+class Heartbeat:
+    """Keeps a task's lease alive from a background thread while the worker is busy."""
+
+    def __init__(self, queue: WorkQueue, task: Task, worker_id: str, lease_seconds: float):
+        self.queue = queue
+        self.task = task
+        self.worker_id = worker_id
+        self.lease_seconds = lease_seconds
+        self.lost = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def __enter__(self) -> "Heartbeat":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        """Renew the lease every third of its length until stopped or lost."""
+        while not self._stop.wait(self.lease_seconds / 3):
+            try:
+                if not self.queue.heartbeat(self.task, self.worker_id, self.lease_seconds):
+                    self.lost = True
+                    return
+            except Exception as e:
+                print(f"Heartbeat for {self.task.url} failed: {e}")
+
+def run_worker(api_key: str, queue_path: Optional[str] = None, worker_id: Optional[str] = None,
+               lease_seconds: float = 300, poll_interval: float = 5.0, exit_when_empty: bool = False,
+               max_attempts: int = 3) -> int:
+    """Claim and analyze URLs until stopped (or, with exit_when_empty, until the queue drains).
+
+    Returns the number of URLs this worker completed.
+    """
+    # Imported here so spawned worker processes only pay for what they use
+    from src.analyzer import DocumentationAnalyzer
+    from src.utils import save_results
+
+    worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+    queue = WorkQueue(queue_path, max_attempts=max_attempts)
+    analyzer = DocumentationAnalyzer(api_key)
+    completed = 0
+    print(f"[{worker_id}] Worker started")
+
+    while True:
+        task = queue.claim(worker_id, lease_seconds)
+        if task is None:
+            if exit_when_empty and not queue.pending_work():
+                break
+            time.sleep(poll_interval)
+            continue
+
+        print(f"[{worker_id}] Analyzing {task.url} (attempt {task.attempts})")
+        try:
+            with Heartbeat(queue, task, worker_id, lease_seconds) as heartbeat:
+                analysis = analyzer.analyze_documentation(task.url)
+                if analyzer.is_fallback_analysis(analysis):
+                    raise Exception("LLM analysis failed")
+                failed = analyzer.failed_categories(analysis)
+                if failed and task.attempts < queue.max_attempts:
+                    # The last attempt stores the partial result, with the failed categories left unscored
+                    raise Exception(f"Analysis failed for {', '.join(failed)}")
+                revised_content = analyzer.generate_revision(task.url, analysis) if task.revise else None
+            if heartbeat.lost:
+                print(f"[{worker_id}] Lease on {task.url} was lost; discarding result")
+                continue
+            analysis_id = save_results(task.url, analysis, revised_content)
+            if queue.complete(task, worker_id, analysis_id):
+                completed += 1
+        except Exception as e:
+            status = queue.fail(task, worker_id, str(e))
+            print(f"[{worker_id}] Failed {task.url}: {e} ({'giving up' if status == DEAD else 'will retry'})")
+
+    print(f"[{worker_id}] Queue drained; {completed} URL(s) completed")
+    return completed
+
+def run_workers(api_key: str, processes: int, **worker_options) -> None:
+    """Start worker processes on this machine and wait for them to exit."""
+    context = multiprocessing.get_context("spawn")
+    workers = [context.Process(target=run_worker, args=(api_key,), kwargs=worker_options, daemon=False)
+               for _ in range(processes)]
+    for worker in workers:
+        worker.start()
+    try:
+        for worker in workers:
+            worker.join()
+    except KeyboardInterrupt:
+        # Unfinished leases expire and are picked up by the next worker run
+        for worker in workers:
+            worker.terminate()
+        for worker in workers:
+            worker.join()
+        raise